@@ -91,11 +91,18 @@ import datetime
 import copy
 import multiprocessing
 import operator         # sort lists according to values in a sub-list.
+import itertools
 
 try:
-    # Try to get numpy, pandas and scipy in at the top level.
+    # Try to get numpy, pandas and scipy in at the top level.  We keep
+    # track of which of numpy and pandas we are importing so that
+    # ProcessFile can name the one that is missing.  It is set to None
+    # once they have both been imported.
+    missing_package = "numpy"
     import numpy as np
+    missing_package = "pandas"
     import pandas as pd
+    missing_package = None
     import scipy.optimize
 except (ModuleNotFoundError, ImportError):
     # We let this pass.  We complain about it if we need it later, after
@@ -228,7 +235,7 @@ def ProcessCurves(curve_triples, settings_dict, last_doodad,
     # We include all the keywords we already processed, so that we can
     # give a better informative error message (6041) later.
     for word in reserved:
-        valid_settings.__setitem__(word, ("QAstr",))
+        valid_settings[word] = ("QAstr",)
 
 
     # Make a list of the valid curve definition words, excluding "#skip".
@@ -4857,15 +4864,15 @@ def ProcessPage(page_triples, settings_dict, files_dict, block_type, log, plt):
     #                ' units.')
         gen.WriteOut("# " + message, plt)
 
-    # Get a list of indices in block triples that hold the start of
-    # a valid sub-block of the page block.  These could be graph blocks
-    # or verbatim blocks.
-    begin_lines = syntax.FindBegins(page_triples)
+    # Get the indices in block triples that hold the start of each
+    # valid sub-block of the page block, sorted by block name.  These
+    # could be graph blocks, image blocks or verbatim blocks.
+    block_begins = IndexBegins(page_triples, syntax.FindBegins(page_triples))
 
     # Now get the list of pointers to where each graph on this
     # page starts.
-    result = GetBegins(page_triples, begin_lines, "graph",
-                        0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(page_triples, block_begins.get("graph", []),
+                             "graph", 0, math.inf, file_name, log)
     if result is None:
         return(None)
     else:
@@ -4873,8 +4880,8 @@ def ProcessPage(page_triples, settings_dict, files_dict, block_type, log, plt):
 
     # Get the list of pointers to where each image on this
     # page starts.
-    result = GetBegins(page_triples, begin_lines, "image",
-                        0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(page_triples, block_begins.get("image", []),
+                             "image", 0, math.inf, file_name, log)
     if result is None:
         return(None)
     else:
@@ -5156,20 +5163,19 @@ def ProcessPlots(line_triples, tr_index, settings_dict, files_dict, log):
         # change the requirements to handle the custom page size and
         # call again.
         if settings_dict["pagesize"][0] == "custom":
-            valid_settings.__setitem__("pagesize",  (("custom",),
-                                                     ("float +  null  a page width"),
-                                                     ("float +  null  a page height"),
-                                                    )
-                                      )
+            valid_settings["pagesize"] = (("custom",),
+                                          ("float +  null  a page width"),
+                                          ("float +  null  a page height"),
+                                         )
             # We make a dictionary of the optional keywords that accepts any
             # optional value.  There is one active one here, the dpi (default is
             # 300 dpi).  We also spoof one for pagesize, because if the user
             # sets a custom page size they may have an optional entry for which
             # units to use (cm, mm, in, pt).  This is ignored here and processed
             # in a second call below.
-            optionals.__setitem__("pagesize", {"units": ("cm", "mm",
-                                                         "in", "inch", "inches",
-                                                         "pt")})
+            optionals["pagesize"] = {"units": ("cm", "mm",
+                                               "in", "inch", "inches",
+                                               "pt")}
             settings = (valid_settings, requireds, optionals, duplicates)
             result = ProcessBlock(line_triples, tr_index, settings_dict,
                                   block_name, settings_dict, settings, log)
@@ -5227,13 +5233,14 @@ def ProcessPlots(line_triples, tr_index, settings_dict, files_dict, log):
 
     # Make a slice of line_triples from "begin plots" to "end plots".
     block_triples = line_triples[begin_index:]
-    # Get a list of indices in block triples that hold the start of
-    # a valid sub-block of the plots block.
-    begin_lines = syntax.FindBegins(block_triples)
+    # Get the indices in block triples that hold the start of each
+    # valid sub-block of the plots block, sorted by block name.
+    block_begins = IndexBegins(block_triples,
+                               syntax.FindBegins(block_triples))
 
     # Now get the list of pointers to where each page block starts.
-    result = GetBegins(block_triples, begin_lines, "page",
-                        0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(block_triples, block_begins.get("page", []),
+                             "page", 0, math.inf, file_name, log)
     if result is None:
         return(None)
     else:
@@ -5242,8 +5249,8 @@ def ProcessPlots(line_triples, tr_index, settings_dict, files_dict, log):
     # Get the list of pointers to where each timeloop block starts.
     # A timeloop is one page plotted at multiple different times,
     # intended to be turned into an animation.
-    result = GetBegins(block_triples, begin_lines, "timeloop",
-                        0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(block_triples, block_begins.get("timeloop", []),
+                             "timeloop", 0, math.inf, file_name, log)
     if result is None:
         return(None)
     else:
@@ -5255,8 +5262,8 @@ def ProcessPlots(line_triples, tr_index, settings_dict, files_dict, log):
     # files (e.g. SES fire simulations with the trains and fire in
     # different locations) and we want broadly similar graphs for
     # each run.
-    result = GetBegins(block_triples, begin_lines, "filesloop",
-                        0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(block_triples, block_begins.get("filesloop", []),
+                             "filesloop", 0, math.inf, file_name, log)
     if result is None:
         return(None)
     else:
@@ -6127,7 +6134,7 @@ def SubBlockParts(line_triples, tr_index, block_name,
         Returns:
             block_lines     []              A list of the lines in the block
     '''
-    # Generate a list of lines that we can use in GetBegins.
+    # Generate a list of the lines in the block.
     block_lines = []
     while True:
         tr_index += 1
@@ -9345,7 +9352,7 @@ def GetTabulated(settings_dict, line_triples, tr_index, log, unbroken,
     return(values_list, QA_data)
 
 
-def ProcessCalc(line_triples, begin_lines, settings_dict, log):
+def ProcessCalc(line_triples, begin_index, settings_dict, log):
     '''Read all the blocks that define a Hobyah calculation and run
     either run the calculation or build the skeleton of an SES input
     file from the Hobyah geometry and routes.
@@ -9357,8 +9364,10 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
                                             Second is the valid data on the line.
                                             Third is the entire line (including
                                             comments) also used in error messages.
-            begin_lines     [int]           List of which entries in line_triples
-                                            are top-level "begin" blocks.
+            begin_index     {str: [int]}    Dictionary of the top-level block
+                                            names.  Each yields a list of
+                                            which entries in line_triples
+                                            start a block of that name.
             settings_dict   {}              The entries in the settings block.
             log             handle          The handle of the logfile.
 
@@ -9469,8 +9478,8 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
 
     debug1 = settings_dict["debug1"]
     # First find where all the sectypes blocks begin (there can be more than one).
-    result = GetBegins(line_triples, begin_lines, "sectypes",
-                       1, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("sectypes", []),
+                             "sectypes", 1, math.inf, file_name, log)
     if result is None:
         return(None)
     # 'result' is a list that indexes where all the "begin sectypes"
@@ -9510,8 +9519,8 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
     # jetfans in each tunnel block's "jetfans1" keyword.
     if debug1:
         print("Processing jet fan types")
-    result = GetBegins(line_triples, begin_lines, "jetfantypes",
-                       0, 1, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("jetfantypes", []),
+                             "jetfantypes", 0, 1, file_name, log)
     if result is None:
         return(None)
     if len(result) == 1:
@@ -9538,8 +9547,8 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
     # Now seek out all the tunnels blocks.
     if debug1:
             print("Processing tunnels")
-    result = GetBegins(line_triples, begin_lines, "tunnel",
-                       1, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("tunnel", []),
+                             "tunnel", 1, math.inf, file_name, log)
     if result is None:
         return(None)
     tunnels_dict = {}
@@ -9558,8 +9567,8 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
     # tunnels).
     if debug1:
             print("Processing clones")
-    result = GetBegins(line_triples, begin_lines, "tunnelclones",
-                       0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("tunnelclones", []),
+                             "tunnelclones", 0, math.inf, file_name, log)
     if result is None:
         return(None)
     else:
@@ -9591,8 +9600,8 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
     # Now seek out all the traintypes blocks.
     if debug1:
         print("Processing traintypes")
-    result = GetBegins(line_triples, begin_lines, "traintype",
-                       0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("traintype", []),
+                             "traintype", 0, math.inf, file_name, log)
     if result is None:
         return(None)
     trtypes_dict = {}
@@ -9622,8 +9631,8 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
     # Now seek out all the routes blocks.
     if debug1:
             print("Processing routes")
-    result = GetBegins(line_triples, begin_lines, "route",
-                       0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("route", []),
+                             "route", 0, math.inf, file_name, log)
     if result is None:
         return(None)
     routes_dict = {}
@@ -9642,8 +9651,8 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
     # Now look for road vehicle type definitions.
     if debug1:
         print("Processing vehicle types")
-    result = GetBegins(line_triples, begin_lines, "traffictypes",
-                       0, 1, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("traffictypes", []),
+                             "traffictypes", 0, 1, file_name, log)
     if result is None:
         return(None)
     if len(result) == 1:
@@ -9672,8 +9681,8 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
     # timestep to the last.  Transient traffic is handled by
     if debug1:
         print("Processing steady-state traffic in routes")
-    result = GetBegins(line_triples, begin_lines, "trafficsteady",
-                       0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("trafficsteady", []),
+                             "trafficsteady", 0, math.inf, file_name, log)
     if result is None:
         return(None)
     # Make a dictionary to hold the traffic blocks.  The keys are the
@@ -9789,8 +9798,8 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
     runtime = settings_dict["aero_time"]
     duration = runtime + 0.1 * dt
     settings_dict.__setitem__("#duration", [duration, str(duration), -1])
-    result = GetBegins(line_triples, begin_lines, "plotcontrol",
-                        0, 1, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("plotcontrol", []),
+                             "plotcontrol", 0, 1, file_name, log)
     if result is None:
         return(None)
     if len(result) == 0:
@@ -9857,8 +9866,8 @@ def ProcessCalc(line_triples, begin_lines, settings_dict, log):
     # Now seek out all the fanchar blocks.
     if debug1:
             print("Processing fan characteristics")
-    result = GetBegins(line_triples, begin_lines, "fanchar",
-                       0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("fanchar", []),
+                             "fanchar", 0, math.inf, file_name, log)
     if result is None:
         return(None)
     fanchars_dict = {}
@@ -18098,7 +18107,8 @@ def ProcessTunnel(line_triples, tr_index, settings_dict, sectypes_dict, log):
 
     for key, settings in new_tun_dict.items():
         if key not in ("back", "fwd", "sectypes", "numbering",  \
-                       "sespragmat", "block_index") and key[:6] != "joins#":
+                       "sespragmat", "block_index")  \
+           and not key.startswith("joins#"):
             location = settings[0]
             line_index = settings[-1]
             if not(back_ch < location < fwd_ch):
@@ -18147,21 +18157,32 @@ def ProcessTunnel(line_triples, tr_index, settings_dict, sectypes_dict, log):
     # things are closer than 1 metre (someone, somewhere will want
     # to use a timestep less than 0.0025 seconds now that computers
     # are ridiculously fast).
-    for (index, (out_ch, out_index)) in enumerate(chs[:-1]):
-        for (in_ch, in_index) in chs[index + 1:]:
+    # If any two entities are too close then two neighbours in a sorted
+    # list of chainages are too close, so we sort the chainages and
+    # compare each one to the next one.  We only do the slow double
+    # loop if there is a clash, so that we complain about the same pair
+    # of lines that we would complain about if we checked every pair.
+    sorted_chs = sorted(ch for (ch, discard) in chs)
+    clash = any(upper - lower <= 1.0
+                for (lower, upper) in zip(sorted_chs, sorted_chs[1:]))
+    if clash:
+        if units == "si":
+            # Allow one metre.  This would work with an aero
+            # timestep of 0.0027 sec but that isn't really
+            # worth using in the tunnel vent field.
+            errtext = "one metre."
+        else:
+            # Allow 3.28 feet
+            errtext = "3.28 feet."
+        # Check the pairs in the order they appear in the tunnel
+        # definition.  The chainages are already floats.
+        pairs = itertools.combinations(chs, 2)
+        for ((out_ch, out_index), (in_ch, in_index)) in pairs:
             if abs(out_ch - in_ch) <= 1.0:
                 # We have two things that are too close.  Figure out
                 # what the first one is.
                 prev_line = line_triples[out_index]
                 current_line = line_triples[in_index]
-                if units == "si":
-                    # Allow one metre.  This would work with an aero timestep
-                    # of 0.0027 sec but that isn't really worth using in the
-                    # tunnel vent field.
-                    errtext = "one metre."
-                else:
-                    # Allow 3.28 feet
-                    errtext = "3.28 feet."
                 if math.isclose(out_ch, in_ch, abs_tol = 1e-9):
                     # They are at the same chainage.
                     err = ('> Came across two entities that are at the\n'
@@ -19409,7 +19430,7 @@ def ProcessJFTypes(line_triples, tr_index, settings_dict, log):
                 }
     # Copy these option for unidirectional fans into the settings
     # for reversible fans.
-    optionals.__setitem__("reversible", optionals["unidirectional"])
+    optionals["reversible"] = optionals["unidirectional"]
     #
     # Make a list of what entries we must have (none, we allow an
     # empty block even if it's a weird thing for a user to do).
@@ -20401,7 +20422,7 @@ def ProcessTraffic1(line_triples, tr_index, settings_dict,
     route_count = len(routes_used)
     flowspec = ("float 0+ null  a vehicle flowrate",) * route_count
     for veh_type in vehcalc_dict:
-        valid_settings.__setitem__(veh_type, flowspec)
+        valid_settings[veh_type] = flowspec
 
     # Add "allroutes" to the list of valid names.  "Allroutes" is a
     # shortcut meaning 'all the routes listed in this trafficsteady
@@ -20414,19 +20435,17 @@ def ProcessTraffic1(line_triples, tr_index, settings_dict,
     # a particular route and set the extents over which stationary
     # traffic extends.
     valid_settings.pop("#skip")
-    valid_settings.__setitem__("standstill",
-                               (tuple(route_names),
-                                "float  0+  null   a vehicle density",
-                                ("PCU/lane-km", "veh/lane-km",
-                                "PCU/lane-mile", "veh/lane-mile"),
-                                # Can't process these two entries yet as we
-                                # don't know the route's portal chainages.
-                                # "float  any  dist1  a traffic start chainage",
-                                # "float  any  dist1  a traffic stop chainage"),
-                                "QAstr"))
-    valid_settings.__setitem__("moving",
-                               (tuple(route_names),
-                                "float  any  speed2   a vehicle speed"))
+    valid_settings["standstill"] = (tuple(route_names),
+                                    "float  0+  null   a vehicle density",
+                                    ("PCU/lane-km", "veh/lane-km",
+                                    "PCU/lane-mile", "veh/lane-mile"),
+                                    # Can't process these two entries yet as we
+                                    # don't know the route's portal chainages.
+                                    # "float  any  dist1  a traffic start chainage",
+                                    # "float  any  dist1  a traffic stop chainage"),
+                                    "QAstr")
+    valid_settings["moving"] = (tuple(route_names),
+                                "float  any  speed2   a vehicle speed")
 
     result = ProcessBlock(line_triples, tr_index, settings_dict,
                           block_name, {}, settings, log)
@@ -26637,7 +26656,9 @@ def ProcessTrType(line_triples, tr_index, settings_dict, trtypes_dict, log):
 def ProcessConstants(line_triples, tr_index, constants_dict,
                      settings_dict, log):
     '''Process a "begin constants...end constants" block and add its
-    values into a dictionary of constants.  Each line has two mandatory
+    values into a dictionary of constants (the dictionary is updated in
+    place, so constants from earlier blocks can be used in the lists
+    in later blocks).  Each line has two mandatory
     entries (a name and a value).  The values are stored as words, not
     as numbers.  Constants may also be assigned lists of values, and these
     lists of values may contain the names of other constants that return
@@ -26652,11 +26673,19 @@ def ProcessConstants(line_triples, tr_index, constants_dict,
                                             comments) also used in error messages.
             tr_index        int             Where to start reading the constants
                                             block.
-            constants_dict  {}              The constants, as a dictionary (input).
+            constants_dict  {}              The constants, as a dictionary.  It
+                                            is updated in place.
+            settings_dict   {}              Dictionary of the run settings.
+                                            Each constant defined in this
+                                            block is added to it with "#"
+                                            before its name (constants that
+                                            redefine ones from an earlier
+                                            block overwrite their entries).
             log             handle          The handle of the logfile.
 
         Returns:
-           constants_dict   {}              The constants, as a dictionary (updated).
+            True            bool            True if the block was processed
+                                            successfully, None otherwise.
 
         Errors:
             Aborts with 2181 if the name of a constant started with "*".
@@ -26697,12 +26726,17 @@ def ProcessConstants(line_triples, tr_index, constants_dict,
     # its value.  Note that this changes a copy of settings_dict, which
     # we discard when we don't return the updated constants dictionary.
     settings_dict.__setitem__("units", "si")
+    # Take a shallow copy of the constants that were set in earlier
+    # blocks.  ProcessBlock puts a new tuple into the dictionary for
+    # every constant in this block, including any that redefine a
+    # constant from an earlier block.  The entries that are still the
+    # same objects as in the copy have already been checked, so we
+    # only need to check the others.
+    earlier = constants_dict.copy()
     result = ProcessBlock(line_triples, tr_index, settings_dict,
                           block_name, constants_dict, settings, log)
     if result is None:
         return(None)
-    else:
-        (discard, constants_dict) = result
     if debug1:
         print("In constants", constants_dict)
 
@@ -26713,14 +26747,18 @@ def ProcessConstants(line_triples, tr_index, constants_dict,
     # anywhere in the name, as these clash with the structure of the
     #  "begin data...end data" blocks and the list of forbidden words.
     for key in constants_dict:
+        if key == "block_index" or constants_dict[key] is earlier.get(key):
+            # No need to process this dictionary entry as a constant,
+            # it's either a constant that was set in an earlier block
+            # and not changed in this one or it's used to point to the
+            # start of the block and is used in error messages.  We
+            # don't break out of the loop here because "block_index"
+            # keeps its place in the dictionary, so when there is more
+            # than one constants block the new constants come after it.
+            continue
         tr_index = constants_dict[key][-1]
         (line_number, discard, line_text) = line_triples[tr_index]
-        if key == "block_index":
-            # No need to process this dictionary entry as a constant,
-            # it's used to point to the start of the block and is
-            # used in error messages.
-            break
-        elif "*" in key:
+        if "*" in key:
             err = ('> Came across a faulty line of input in \n'
                    '> "' + file_name + '".\n'
                    '> The line set a constant ("' + key + '").\n'
@@ -26823,7 +26861,20 @@ def ProcessConstants(line_triples, tr_index, constants_dict,
                      line_text, log)
             if result is None:
                 return(None)
-    return(constants_dict)
+        # Now we add the constant to the settings dictionary.  When we
+        # set the key of the constant we prepend a '#' character to
+        # the key so that we can avoid name conflicts with the dictionary
+        # keys that were defined in the "settings" block.  We store a
+        # list of the value, the line text and the line number.
+        #
+        # Note that we don't need to check for duplicates within this
+        # block.  If there were any, error 2106 would have already been
+        # raised.  A constant that redefines one from an earlier block
+        # overwrites the earlier entry, so settings_dict always holds
+        # the same value as constants_dict.
+        settings_dict["#" + key.lower()] = [constants_dict[key][0],
+                                            line_text, line_number]
+    return(True)
 
 
 def CheckListAndRange(maybe_list, constants_dict, settings_dict, line_triples,
@@ -27620,13 +27671,10 @@ def SpoofConstants(constants_dict, settings_dict):
     return(constants_dict)
 
 
-def GetBegins(line_triples, begin_lines, block_name, min_entries, max_entries,
-              file_name, debug1, log):
-    '''Make a list of all the blocks (or sub-blocks in the current block)
-    that have a particular block name, such as "tunnel".  Check the count
-    of blocks against how many we expect (set by min_entries to max_entries,
-    which could be zero to math.inf).  Finish when we encounter an "end"
-    command that finishes the current block.
+def IndexBegins(line_triples, begin_lines):
+    '''Take the list of top-level "begin" lines and sort them into a
+    dictionary keyed by block name, so that we only split each "begin"
+    line once instead of once for every type of block we look for.
 
         Parameters:
             line_triples [(int, str, str)]  List of lines in the file.  First
@@ -27637,12 +27685,41 @@ def GetBegins(line_triples, begin_lines, block_name, min_entries, max_entries,
                                             comments) also used in error messages.
             begin_lines     [int]           List of which entries in line_triples
                                             are top-level "begin" blocks.
+
+        Returns:
+            begin_index     {str: [int]}    Dictionary of the block names (in
+                                            lower case).  Each yields a list of
+                                            the entries in line_triples that
+                                            start a block of that name, in the
+                                            order they appear in the file.
+    '''
+    begin_index = {}
+    for entry in begin_lines:
+        block_name = line_triples[entry][1].lower().split()[1]
+        begin_index.setdefault(block_name, []).append(entry)
+    return(begin_index)
+
+
+def CheckBeginCount(line_triples, matches, block_name, min_entries,
+                    max_entries, file_name, log):
+    '''Take a list of the blocks that have a particular block name and
+    check the count of blocks against how many we expect (set by
+    min_entries to max_entries, which could be zero to math.inf).
+
+        Parameters:
+            line_triples [(int, str, str)]  List of lines in the file.  First
+                                            entry is the line number in the file
+                                            (starting at one, not zero).
+                                            Second is the valid data on the line.
+                                            Third is the entire line (including
+                                            comments) also used in error messages.
+            matches         [int]           List of which entries in line_triples
+                                            start a block named block_name.
             block_name      str             The word we expect after "begin"
             min_entries     int             The minimum number of blocks we want
             max_entries     int             The maximum number of blocks we want
             file_name       str             The file name without the
                                             file path.
-            debug1          bool            The debug Boolean set by the user.
             log             handle          The handle of the logfile.
 
         Returns:
@@ -27656,27 +27733,6 @@ def GetBegins(line_triples, begin_lines, block_name, min_entries, max_entries,
             Aborts with 2064 if there were too few blocks and more
             than one block was needed.
     '''
-    # Make a list to hold the index numbers of the lines that match
-    # the "begin" block we want.
-    matches = []
-    # Make a counter.  We increment it each time we encounter a "begin"
-    # and decrement it each time we encounter an "end".  If it goes
-    # negative we break out of the loop, because we've finished the
-    # current block.  This lets us look for "begin graph" but only
-    # on the current "page" block: the moment we hit "end page this
-    # counter goes negative.
-    end_counter = 0
-    for entry in begin_lines:
-        (line_number, line_data, line_text) = line_triples[entry]
-        beginning = line_data.lower().split()
-        if beginning[0] == "begin":
-            end_counter += 1
-            if block_name == "#name" or beginning[1] == block_name:
-                matches.append(entry)
-        elif beginning[0] == "end":
-            end_counter -= 1
-        if end_counter < 0:
-            break
     if len(matches) > max_entries:
         # We have too many of this kind of block.  Complain
         # about the excess and give the line numbers of the
@@ -28173,7 +28229,9 @@ def ProcessCsvData(line_triples, tr_index, settings_dict, used_nicknames, log):
     while tr_index < len(line_triples):
         tr_index += 1
         (line_number, line_data, line_text) = line_triples[tr_index]
-        if line_data.split() == ["end", "csv"]:
+        end_words = line_data.split()
+        if (len(end_words) == 2 and end_words[0] == "end"
+            and end_words[1] == "csv"):
             # We are at the end of the block
             break
 
@@ -28702,7 +28760,9 @@ def ProcessUserData(line_triples, tr_index, csv_file, settings_dict, log):
     for (line_number, line_data, line_text) in line_triples[tr_index:]:
     # while True:
     #     (line_number, line_data, line_text) == line_triples[tr_index]
-        if line_data.split() == ["end", "data"]:
+        end_words = line_data.split()
+        if (len(end_words) == 2 and end_words[0] == "end"
+            and end_words[1] == "data"):
             # We've reached the end of the data block.
             break
         else:
@@ -28899,7 +28959,9 @@ def ProcessPlotFiles(line_triples, tr_index, settings_dict, log):
     while tr_index < len(line_triples):
         tr_index += 1
         (line_number, line_data, line_text) = line_triples[tr_index]
-        if line_data.split() == ["end", "files"]:
+        end_words = line_data.split()
+        if (len(end_words) == 2 and end_words[0] == "end"
+            and end_words[1] == "files"):
             # We are at the end of the block
             break
 
@@ -29020,11 +29082,12 @@ def ProcessPlotFiles(line_triples, tr_index, settings_dict, log):
             gen.ErrorOnLine(line_number, line_text, log, False)
             return(None)
         else:
-            full_name = pf_dir_name + bin_file_name
+            full_name = os.path.join(pf_dir_name, bin_file_name)
 
-        try:
-            bin_handle = open(full_name, "rb")
-        except FileNotFoundError:
+        # Check that the binary file exists and that we can read it.  We
+        # don't need to open it here (the binary file classes do that),
+        # so we ask the operating system instead of opening and closing it.
+        if not os.access(full_name, os.F_OK):
             # The binary file doesn't exist.  Complain and return.
             if bin_file_name[-4:] == ".hbn":
                 source_name = bin_file_name[:-4] + '.txt'
@@ -29045,7 +29108,7 @@ def ProcessPlotFiles(line_triples, tr_index, settings_dict, log):
             gen.WriteError(2149, err, log)
             gen.ErrorOnLine(line_number, line_text, log, False)
             return(None)
-        except PermissionError:
+        elif not os.access(full_name, os.R_OK):
             # The binary file exists but we don't have permission
             # to read it.  Complain and return.
             err = ('> One of the binary output files in the "files"\n'
@@ -29061,9 +29124,8 @@ def ProcessPlotFiles(line_triples, tr_index, settings_dict, log):
             return(None)
         else:
             # The binary file exists and we have permission to read
-            # it.  We try to read its contents, assign the path and
-            # name of the binary file to the nickname and close the
-            # file.
+            # it.  We try to read its contents and assign the path and
+            # name of the binary file to the nickname.
             if bin_file_name[-4:] == ".hbn":
                 contents = clHobyah.Hobyahdata(pf_dir_name, bin_file_name,
                                                log, line_number, line_text)
@@ -29080,8 +29142,7 @@ def ProcessPlotFiles(line_triples, tr_index, settings_dict, log):
                 return(None)
             # Put the binary file path/name and the contents into
             # files_dict.
-            files_dict.__setitem__(nickname, (full_name, contents))
-            bin_handle.close()
+            files_dict[nickname] = (full_name, contents)
 
     # Write the files and their nicknames to the log file for the
     # record.
@@ -29116,9 +29177,9 @@ def RaiseTooFew(req_words, file_name, optionals_dict, line_number, line_text, lo
             words on it and there were optional entries.
     '''
     # We have too few mandatory entries on this line.
-    err = ('> Came across a faulty setting in "' + file_name + '".\n'
+    err = (f'> Came across a faulty setting in "{file_name}".\n'
            '> The setting has too few entries in it\n'
-           '> (expected ' + str(req_words+1) + ' words).'
+           f'> (expected {req_words + 1} words).'
           )
     if optionals_dict == {}:
         gen.WriteError(2102, err, log)
@@ -29126,8 +29187,8 @@ def RaiseTooFew(req_words, file_name, optionals_dict, line_number, line_text, lo
     else:
         # One of the optional entries may have consumed a keyword,
         # add a list of the optional entries and use a different
-        # number
-        err = err + gen.ListTheKeys(optionals_dict)
+        # number.  We join the two parts in one pass.
+        err = "".join((err, gen.ListTheKeys(optionals_dict)))
         gen.WriteError(2103, err, log)
         gen.ErrorOnLine(line_number, line_text, log, False)
     return(None)
@@ -29155,11 +29216,11 @@ def RaiseDudSpec(dud_entry, block_name, file_name, log):
     '''
     err = ('> Found an invalid definition in the source\n'
            '> code.  It was\n'
-           '>   "' + str(dud_entry) + '".\n'
+           f'>   "{dud_entry}".\n'
            '> instead of a tuple of valid words or a string\n'
            '> starting with "int", "float" or "#name".\n'
            '> The block being processed at the time was\n'
-           '> "' + block_name + '".\n'
+           f'> "{block_name}".\n'
            '>'
            )
     gen.WriteError(1202, err, log)
@@ -29167,6 +29228,93 @@ def RaiseDudSpec(dud_entry, block_name, file_name, log):
     return(None)
 
 
+# Tags that ClassifySpec gives to each entry in the specification of a
+# keyword, so that ProcessBlock can test an integer instead of slicing
+# and comparing strings for every word it reads.
+SPEC_NUMBER = 0     # "int...", "float..." or "*float..."
+SPEC_NAME = 1       # "#name"
+SPEC_QASTR = 2      # "QAstr"
+SPEC_TUPLE = 3      # A tuple of allowable words
+SPEC_DUD = 4        # Something we mis-spelled in the source code
+
+# A dictionary of the specifications we have already classified.  The
+# keys are the tuples in the valid_settings dictionaries and the values
+# are the classified tuples.
+classified_specs = {}
+
+
+def ClassifySpec(spec):
+    '''Take the specification of a keyword from a valid_settings
+    dictionary and turn it into a tuple of (tag, payload) pairs that
+    PROC ProcessBlock can process without any string slicing.  The
+    result is stored so that each specification is only classified once
+    per run.
+
+        Parameters:
+            spec            ()              The entries a keyword expects,
+                                            e.g. ("float any dist1 a chainage",
+                                                  "#name", "QAstr")
+
+        Returns:
+            classified      ()              A tuple of (tag, payload) pairs,
+                                            one for each entry in spec.  The
+                                            payload is the number specifier
+                                            for SPEC_NUMBER, the original
+                                            entry for SPEC_DUD and a tuple
+                                            of the original tuple and a
+                                            dictionary for SPEC_TUPLE.  The
+                                            dictionary keys are the allowable
+                                            words in lower case and the values
+                                            are (sub_tag, sub_expected).  The
+                                            sub_tag is None if the word does
+                                            not consume the next word on the
+                                            line.
+    '''
+    try:
+        return(classified_specs[spec])
+    except KeyError:
+        pass
+    classified = []
+    for expected in spec:
+        if type(expected) is tuple:
+            # Split each allowable word from the specifier (if any) that
+            # follows it.  Some words stand alone ("frictiontype"), others
+            # need a number ("portal") or a name ("node") after them.
+            # If a word appears twice, the first one wins (as it did
+            # when we searched the tuple in order).
+            choices = {}
+            for entry in expected:
+                exp_entries = entry.split(maxsplit = 1)
+                choice = exp_entries[0].lower()
+                if choice in choices:
+                    continue
+                elif len(exp_entries) == 1:
+                    choices[choice] = (None, None)
+                else:
+                    sub_expected = exp_entries[1]
+                    if sub_expected == "#name":
+                        sub_tag = SPEC_NAME
+                    elif sub_expected.startswith(("int", "float", "*float")):
+                        sub_tag = SPEC_NUMBER
+                    else:
+                        sub_tag = SPEC_DUD
+                    choices[choice] = (sub_tag, sub_expected)
+            classified.append((SPEC_TUPLE, (expected, choices)))
+        elif type(expected) is not str:
+            classified.append((SPEC_DUD, expected))
+        elif expected.startswith(("int", "float", "*float")):
+            classified.append((SPEC_NUMBER, expected))
+        elif expected == "#name":
+            classified.append((SPEC_NAME, None))
+        elif expected == "QAstr":
+            classified.append((SPEC_QASTR, None))
+        else:
+            classified.append((SPEC_DUD, expected))
+    classified = tuple(classified)
+    classified_specs[spec] = classified
+    return(classified)
+
+
 def ProcessBlock(line_triples, tr_index, settings_dict,
                  block_name, block_dict, block_settings, log):
     '''Read a block of a given name and process its entries
@@ -29258,10 +29406,18 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
         # So we don't convert to SI here when reading the settings,
         # we convert in PROC ProcessSettings.
         toSI = False
-
-    # Create a list that we use to track duplicates and another used
-    # to track entities that are too close together.
-    used = []
+    # Make local names for the routines we call for every word on every
+    # line of the block.  Local names are quicker to look up than module
+    # attributes and globals.
+    enth = gen.Enth
+    check_range = CheckRangeAndSI
+    write_log = log.write
+
+    # Create a set that we use to track duplicates and a list used
+    # to track entities that are too close together.  The set makes
+    # the check for duplicates a lookup instead of a search, which
+    # matters in blocks with hundreds of entries.
+    used = set()
     chainages = []
     # Break out the settings into its components.
     #
@@ -29296,7 +29452,7 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
     # development work.
     if all_words[:2] != ["begin", block_name]:
         print("> Oops, fouled up in ProcessBlock with:\n> ", line_text,
-              '\n> when expecting "' + block_name + '".')
+              f'\n> when expecting "{block_name}".')
         # raise()
         gen.OopsIDidItAgain(log, file_name)
         return(None)
@@ -29317,11 +29473,9 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
         else:
             dud = False
         if dud:
-            err = ('> In the file named "' + file_name + '"\n'
-                   '> the name of ' + block_name + ' "' + entity_name
-                     + '" is\n'
-                   '> not valid because it' + complaint
-                     + ' a reserved symbol.\n'
+            err = (f'> In the file named "{file_name}"\n'
+                   f'> the name of {block_name} "{entity_name}" is\n'
+                   f'> not valid because it{complaint} a reserved symbol.\n'
                    '> Please edit the file to remove it.'
                   )
             gen.WriteError(2113, err, log)
@@ -29337,9 +29491,11 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
     # the begin...end syntax check).
     if debug1:
         print("List in ProcessBlock:\n", line_triples)
-    while tr_index < len(line_triples):
-        tr_index += 1
-        (line_number, line_data, line_text) = line_triples[tr_index]
+    # We iterate over the lines after the "begin" line instead of
+    # indexing line_triples and testing its length on every line.
+    block_lines = itertools.islice(line_triples, tr_index + 1, None)
+    for tr_index, (line_number, line_data, line_text) in \
+                                enumerate(block_lines, start = tr_index + 1):
         # Get the optional entries on the line into a dictionary.
         result = gen.GetOptionals(line_number, line_data, line_text,
                  file_name, debug1, log)
@@ -29348,15 +29504,17 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
         else:
             (line_data, optionals_dict) = result
         # Now split the remainder of the line up.  We know we still have
-        # data on the line.
-        all_words = line_data.lower().split()
-        if all_words == ["end", block_name]:
+        # data on the line.  We only turn the first word to lower case
+        # until we know that this is not the end of the block.
+        all_words = line_data.split()
+        keyword = all_words[0].lower()
+        if (keyword == "end" and len(all_words) == 2
+            and all_words[1].lower() == block_name):
             # We are at the end of the block
             break
         # If we got to here all is OK.  Split the contents of the line into
-        # the key and a list of values.
-        keyword = all_words[0]
-        words = all_words[1:]
+        # the key and a list of values (in lower case).
+        words = [word.lower() for word in all_words[1:]]
 
         # Now check if the first word is a valid key and fault if it is not.
         process_this = True
@@ -29375,17 +29533,18 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
             elif "#name" in valid_settings:
                 # We do allow random names.  Set an entry for the random
                 # word in valid_settings and optionals (if necessary).
-                valid_settings.__setitem__(keyword, valid_settings["#name"])
+                valid_settings[keyword] = valid_settings["#name"]
                 if "#name" in optionals:
-                    optionals.__setitem__(keyword, optionals["#name"])
+                    optionals[keyword] = optionals["#name"]
             else:
                 # Get the keys in the settings dictionary into a list so
                 # that we can have them pretty-printed.
-                err = ('> Came across an unrecognised keyword in "' + file_name + '".\n'
-                       '> The keyword is "' + keyword + '".  Valid keywords\n'
-                       '> are as follows:\n'
-                       + gen.FormatOnLines(valid_settings.keys())
-                      )
+                parts = (f'> Came across an unrecognised keyword in "{file_name}".\n'
+                         f'> The keyword is "{keyword}".  Valid keywords\n'
+                         '> are as follows:\n',
+                         gen.FormatOnLines(valid_settings.keys())
+                        )
+                err = "".join(parts)
                 gen.WriteError(2101, err, log)
                 gen.ErrorOnLine(line_number, line_text, log, False)
                 return(None)
@@ -29397,6 +29556,12 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
             # that require a number, like the keyword "portal", which needs
             # a number (wind pressure) after it.
             req_words = len(valid_settings[keyword])
+            # Get the specification of this keyword and its length once,
+            # rather than looking them up for every word we consume.  The
+            # specification is classified into integer tags so that we
+            # don't need to slice strings to figure out what each entry is.
+            spec = ClassifySpec(valid_settings[keyword])
+            spec_len = len(spec)
 
 
             # Now start checking the keys and values.
@@ -29408,7 +29573,7 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                 # "-debug1" is set), state the conversion factors and units
                 # for each number in the logfile (in USc.ConvertToSI),
                 # then write the dictionary in SI units to the logfile.
-                log.write('Read a line in US units: "' + line_data + '"\n')
+                write_log(f'Read a line in US units: "{line_data}"\n')
 
             # Now run through the entries checking if the values are
             # consistent with what we expect (e.g. where we expect an
@@ -29435,20 +29600,29 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
             w_index = 0
             # Create a second counter to where we are in the expected settings.
             s_index = 0
+            # Some entries need the words on the line in their original case
+            # with the remainder of the line in the last word (QA strings
+            # and the words after keywords like "portal" and "node").  We
+            # split the line that way at most once per line, the first time
+            # we need it.
+            tail_words = None
+            # Count the words once.  We update the count if we swap in the
+            # words from tail_words.
+            n_words = len(words)
             while True:
                 # Get the type of entry we expect for this: integer, float,
                 # word or QA string.
-                if s_index == len(valid_settings[keyword]):
+                if s_index == spec_len:
                     # We have reached the end of the definition.
                     break
                 else:
-                    expected = valid_settings[keyword][s_index]
+                    (tag, expected) = spec[s_index]
 
                 # Now see if we have an entry for it on the line.
-                try:
+                if w_index < n_words:
                     word = words[w_index]
-                except IndexError:
-                    if expected == "QAstr":
+                else:
+                    if tag == SPEC_QASTR:
                         # We are reading a line of entry that is allowed to
                         # have an optional description at the end of the line
                         # but does not have one.  Set the optional description
@@ -29464,41 +29638,42 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
 
                 # If we get to here we have a valid word and a valid
                 # description.
-                place = gen.Enth(w_index + 1)
+                place = enth(w_index + 1)
 
                 # Now check for numbers, which may be integer or float.
-                if (expected[:3] == "int" or
-                    expected[:5] == "float" or
-                    expected[:6] == "*float"):
+                if tag == SPEC_NUMBER:
                     # Build a couple of lines of error text for CheckRangeAndSI.
                     # We do this here because we're talking about keywords and
                     # CheckRangeAndSI is also called by the routine that
                     # processes optional arguments, which sends it a different
                     # pair of error lines.
-                    err_lines = ('> The ' + place + ' entry for keyword "'
-                                + keyword + '" was "' + word + '"')
+                    err_lines = (f'> The {place} entry for keyword '
+                                 f'"{keyword}" was "{word}"')
 
-                    result = CheckRangeAndSI(word, expected, toSI, err_lines,
-                                             line_number, line_text,
-                                             settings_dict, log)
+                    result = check_range(word, expected, toSI, err_lines,
+                                         line_number, line_text,
+                                         settings_dict, log)
                     if result is None:
                         return(None)
                     else:
                         entries.append(result)
-                elif expected == "#name":
+                elif tag == SPEC_NAME:
                     # This word can be any word.  It is the name of something
                     # else, such as the name of a sectype in a tunnel.  We
                     # don't check it here, we check it later in whichever
                     # routine called ProcessBlock.
                     entries.append(word.strip())
-                elif expected == "QAstr":
+                elif tag == SPEC_QASTR:
                     # This setting can be anything it wants to be, as it is a
                     # QA string - a project number, project description or
                     # the description of a tunnel.
                     # It is always the last entry in a line of input and
                     # consumes all the rest of the line.
-                    words = line_data.split(maxsplit = req_words)[1:]
-                    if len(words) > w_index:
+                    if tail_words is None:
+                        tail_words = line_data.split(maxsplit = req_words)[1:]
+                    words = tail_words
+                    n_words = len(words)
+                    if n_words > w_index:
                         # We do have some comments after the required entries,
                         # which are the last in the list.
                         entries.append(words[-1])
@@ -29506,7 +29681,7 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                         # is the second point at which we could break out of the
                         # line.
                         break
-                elif type(expected) is tuple:
+                elif tag == SPEC_TUPLE:
                     # We want one of a list of words (e.g. ["portal", "node"]).
                     # There is a complication, though.  Some words stand alone
                     # ("frictiontype" does).  Others (such as "portal") require
@@ -29516,13 +29691,9 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                     # This block checks those words and if necessary, processes
                     # the number that follows and updates the counters named
                     # req_words and w_index.
-                    found = False
-                    for entry in expected:
-                        exp_entries = entry.split(maxsplit = 1)
-                        if exp_entries[0].lower() == word:
-                            found = True
-                            break
-                    if not found:
+                    (expected, choices) = expected
+                    match = choices.get(word)
+                    if match is None:
                         if len(expected) == 0:
                             # The user probably put in the second step of a
                             # two-step process without doing the first step.
@@ -29533,46 +29704,49 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                                      '> defined in two steps (traffic, jet fans,\n'
                                      '> jet fans etc.) and only did the 2nd step.')
                         else:
-                            text1 = '> Valid entries for this are: \n'  \
-                                      + gen.FormatOnLines(expected)
-
-                        err = ('> Came across an unrecognised entry in "' + file_name + '".\n'
-                               '> The ' +gen.Enth(w_index + 1) + ' entry for keyword "'
-                                  + keyword + '" was "' + word + '".\n'
-                                  + text1
-                              )
+                            text1 = ('> Valid entries for this are: \n'
+                                     + gen.FormatOnLines(expected))
+
+                        parts = (f'> Came across an unrecognised entry in "{file_name}".\n'
+                                 f'> The {place} entry for keyword "{keyword}"'
+                                   f' was "{word}".\n',
+                                 text1
+                                )
+                        err = "".join(parts)
                         gen.WriteError(2104, err, log)
                         gen.ErrorOnLine(line_number, line_text, log, False)
                         return(None)
                     else:
                         entries.append(word)
+                        (sub_tag, sub_expected) = match
 
 
-                    if len(exp_entries) > 1:
+                    if sub_tag is not None:
                         # We are expecting this keyword to consume another
                         # word, but we don't know what it is yet (#name, int
                         # or float).  Update  the list of words we have and
                         # the counters.
                         w_index += 1
-                        words = line_data.split(maxsplit = req_words)[1:]
-                        place = gen.Enth(w_index + 1)
-                        try:
+                        if tail_words is None:
+                            tail_words = line_data.split(maxsplit = req_words)[1:]
+                        words = tail_words
+                        n_words = len(words)
+                        place = enth(w_index + 1)
+                        if w_index < n_words:
                             word = words[w_index]
-                        except IndexError:
+                        else:
                             # There were too few entries on the line.  Complain.
                             RaiseTooFew(req_words, file_name, optionals_dict,
                                             line_number, line_text, log)
                             return(None)
 
 
-                        if exp_entries[1] == "#name":
+                        if sub_tag == SPEC_NAME:
                             # We have a valid word that needs a name after
                             # it, and we have a valid entry.  Add it and
                             # carry on with the next word.
                             entries.append(word.strip())
-                        elif (exp_entries[1][:3] == "int" or
-                              exp_entries[1][:5] == "float" or
-                              exp_entries[1][:6] == "*float"):
+                        elif sub_tag == SPEC_NUMBER:
                             # We have a valid word that needs a number after
                             # it.  The remainder of the text on the line ought
                             # to be a number format text in a form that suits
@@ -29580,14 +29754,13 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                             # there.
                             # We're expecting a number and sub_expected is a
                             # number specifier.
-                            sub_expected = exp_entries[1]
-                            err_lines = ('> The ' + place + ' entry for keyword "'
-                                        + keyword + '" was "' + word + '"')
-
-                            result = CheckRangeAndSI(word, sub_expected, toSI,
-                                                     err_lines,
-                                                     line_number, line_text,
-                                                     settings_dict, log)
+                            err_lines = (f'> The {place} entry for keyword '
+                                         f'"{keyword}" was "{word}"')
+
+                            result = check_range(word, sub_expected, toSI,
+                                                 err_lines,
+                                                 line_number, line_text,
+                                                 settings_dict, log)
                             if result is None:
                                 return(None)
                             else:
@@ -29613,9 +29786,9 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
             # entry have a word and a value (e.g. portal) while others don't
             # (e.g. node).
             if len(words) > req_words:
-                err = ('> Came across a faulty setting in "' + file_name + '".\n'
+                err = (f'> Came across a faulty setting in "{file_name}".\n'
                        '> The setting has too many entries in it\n'
-                       '> (expected ' + str(req_words + 1) + ' words).'
+                       f'> (expected {req_words + 1} words).'
                       )
                 gen.WriteError(2105, err, log)
                 gen.ErrorOnLine(line_number, line_text, log, False)
@@ -29636,9 +29809,9 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                 dict_key = keyword
                 # Check for duplicate entries and complain if we find one.
                 if dict_key in used:
-                    err = ('> Came across a duplicate keyword in "' + file_name + '".\n'
-                           '> The keyword "' + keyword + '" has been used already in\n'
-                           '> this "' + block_name + '" block and you must have\n'
+                    err = (f'> Came across a duplicate keyword in "{file_name}".\n'
+                           f'> The keyword "{keyword}" has been used already in\n'
+                           f'> this "{block_name}" block and you must have\n'
                            '> only one of them per block.'
                           )
                     gen.WriteError(2106, err, log)
@@ -29648,11 +29821,11 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                 # Construct a dictionary key with the keyword, '#' and the
                 # tr_index of this line.  The '#' symbol is so that it can't
                 # be spoofed and the addition of tr_index makes it unique.
-                dict_key = keyword + '#' + str(tr_index)
+                dict_key = f'{keyword}#{tr_index}'
 
-            # Add the keyword to the list of keys already used, for the error
+            # Add the keyword to the set of keys already used, for the error
             # message above.
-            used.append(keyword)
+            used.add(keyword)
 
             # Add the chainage to the list, so we can check for duplicates later.
             chainages.append(entries[0])
@@ -29665,15 +29838,15 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                 if  count_keys != 0:
                     # There is an optional entry set in a keyword
                     # where none are allowed.
-                    err = ('> Came across an invalid optional entry in\n'
-                           '> "' + file_name + '".\n'
-                           '> The keyword "' + keyword + '" has no valid\n'
-                           "> optional entries, but you've set "
-                          )
                     if count_keys == 1:
-                        err = err + 'one.\n> Please remove it.'
+                        tail = 'one.\n> Please remove it.'
                     else:
-                        err = err + str(count_keys) + '.\n> Please remove them.'
+                        tail = f'{count_keys}.\n> Please remove them.'
+                    err = ('> Came across an invalid optional entry in\n'
+                           f'> "{file_name}".\n'
+                           f'> The keyword "{keyword}" has no valid\n'
+                           f"> optional entries, but you've set {tail}"
+                          )
                     gen.WriteError(2107, err, log)
                     gen.ErrorOnLine(line_number, line_text, log, False)
                     return(None)
@@ -29693,23 +29866,24 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                         # The optional entry is wrong (mis-spelled or not
                         # valid for this line of entry).
 
-                        err = ('> Came across an invalid optional entry in\n'
-                               '> "' + file_name + '".\n'
-                               '> The keyword "' + keyword + '" cannot use the\n'
-                               '> optional entry "' + opt_key + '", ')
+                        parts = ['> Came across an invalid optional entry in\n'
+                                 f'> "{file_name}".\n'
+                                 f'> The keyword "{keyword}" cannot use the\n'
+                                 f'> optional entry "{opt_key}", ']
                         # Now finish the message depending on how many keywords
                         # are allowed.
-                        allowed_keys = list(allowables.keys())
-                        if len(allowed_keys) == 1:
-                            err = err + ('there is one\n'
+                        if len(allowables) == 1:
+                            (only_key,) = allowables
+                            parts.append('there is one\n'
                                          '> valid optional entry for this keyword,\n'
-                                         '> "' + allowed_keys[0] + '".'
+                                         f'> "{only_key}".'
                                         )
                         else:
-                            err = err + ('the only valid\n'
-                                         '> optional entries for this keyword are:\n'
-                                         + gen.FormatOnLines(allowables)
-                                        )
+                            parts.extend(('the only valid\n'
+                                          '> optional entries for this keyword are:\n',
+                                          gen.FormatOnLines(allowables)
+                                         ))
+                        err = "".join(parts)
                         gen.WriteError(2108, err, log)
                         gen.ErrorOnLine(line_number, line_text, log, False)
                         return(None)
@@ -29718,45 +29892,44 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                     # to SI.
                     expected = allowables[opt_key]
                     opt_word = optionals_dict[opt_key]
-                    if expected[:3] == "int" or expected[:5] == "float":
+                    if type(expected) is str and expected.startswith(("int", "float")):
                         # Build a couple of lines of error text for CheckRangeAndSI.
                         # We do this here because we're talking about optional keys
                         # and values. CheckRangeAndSI is also called when we
                         # process required arguments, which sends it a different
                         # pair of error lines.
-                        err_lines = ('> The optional entry "' + opt_key
-                                        + '" was assigned\n'
-                                     '> the value "' + opt_word + '"')
-                        result = CheckRangeAndSI(opt_word, expected, toSI, err_lines,
-                                                 line_number, line_text,
-                                                 settings_dict, log)
+                        err_lines = (f'> The optional entry "{opt_key}" was assigned\n'
+                                     f'> the value "{opt_word}"')
+                        result = check_range(opt_word, expected, toSI, err_lines,
+                                             line_number, line_text,
+                                             settings_dict, log)
                         if result is None:
                             return(None)
                         elif toSI:
                             # We converted the number from US units to SI, reset
                             # the value.
-                            optionals_dict.__setitem__(opt_key, result)
+                            optionals_dict[opt_key] = result
                     elif type(expected) is tuple and opt_word.lower() not in expected:
                         # We are expecting one of a list of allowable words.
-                        err = ('> Came across an invalid optional entry in\n'
-                               '> "' + file_name + '".\n'
-                               '> The optional entry "' + opt_key + '" was assigned\n'
-                               '> the value "' + opt_word + '".  '
-
-                               )
+                        parts = ['> Came across an invalid optional entry in\n'
+                                 f'> "{file_name}".\n'
+                                 f'> The optional entry "{opt_key}" was assigned\n'
+                                 f'> the value "{opt_word}".  '
+                                ]
                         # Now finish the message depending on how many values
                         # are permitted.  We don't actually have options with only
                         # one entry at the moment but I'm sure one will appear.
                         if len(expected) == 1:
-                            err = err + ('There is one\n'
+                            parts.append('There is one\n'
                                          '> valid optional entry for this keyword,\n'
-                                         '> "' + expected[0] + '".'
+                                         f'> "{expected[0]}".'
                                         )
                         else:
-                            err = err + ('The only valid\n'
-                                         '> optional entries for this keyword are:\n'
-                                         + gen.FormatOnLines(expected)
-                                        )
+                            parts.extend(('The only valid\n'
+                                          '> optional entries for this keyword are:\n',
+                                          gen.FormatOnLines(expected)
+                                         ))
+                        err = "".join(parts)
                         gen.WriteError(2109, err, log)
                         gen.ErrorOnLine(line_number, line_text, log, False)
                         return(None)
@@ -29764,7 +29937,7 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
             # All is well.  Add the dictionary of optional keywords to the
             # entries, convert it to a tuple and set it in the dictionary.
             entries.extend([optionals_dict, tr_index])
-            block_dict.__setitem__(dict_key, tuple(entries))
+            block_dict[dict_key] = tuple(entries)
             if block_name in ("sectypes",):
                 # Write the block_dict to the log file (this is for blocks with
                 # many independent entries).  We spoof a dictionary holding
@@ -29812,16 +29985,17 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                     text1 = " four "
                 else:
                     text1 = " many "
-                err = ('> Came across a ' + block_name + ' definition\n'
-                       '> in "' + file_name + '"\n'
-                       '> that lacked one of' + text1 + 'required (but\n'
-                       '> mutually exclusive) entries:\n'
-                       + gen.FormatOnLines(poss_key, lastword = "or") + '\n'
-                       '> Please add a line to define one of them.\n'
-                       '> The faulty block of input started at the '
-                         + gen.Enth(start_number) + ' line:\n'
-                        '>   ' + start_text
-                      )
+                parts = (f'> Came across a {block_name} definition\n'
+                         f'> in "{file_name}"\n'
+                         f'> that lacked one of{text1}required (but\n'
+                         '> mutually exclusive) entries:\n',
+                         gen.FormatOnLines(poss_key, lastword = "or"),
+                         '\n> Please add a line to define one of them.\n'
+                         '> The faulty block of input started at the '
+                           f'{gen.Enth(start_number)} line:\n'
+                         f'>   {start_text}'
+                        )
+                err = "".join(parts)
                 gen.WriteError(2111, err, log)
                 # gen.ErrorOnLine(start_number, start_text, log, False)
                 return(None)
@@ -29845,13 +30019,14 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                 line2_num, discard, line2_text = line_triples[tr2_index]
                 line3_num, discard, line3_text = line_triples[tr3_index]
                 line4_num, discard, line4_text = line_triples[tr4_index]
-                err = ('> Came across a ' + block_name + ' definition\n'
-                       '> in "' + file_name + '" that\n'
-                       '> had too many mutually exclusive entries.\n'
-                       '> The following entries are mutually exclusive:\n'
-                       + gen.FormatOnLines(poss_key) + '\n'
-                       '> Please remove all but one of them.'
-                      )
+                parts = (f'> Came across a {block_name} definition\n'
+                         f'> in "{file_name}" that\n'
+                         '> had too many mutually exclusive entries.\n'
+                         '> The following entries are mutually exclusive:\n',
+                         gen.FormatOnLines(poss_key),
+                         '\n> Please remove all but one of them.'
+                        )
+                err = "".join(parts)
                 gen.WriteError(2112, err, log)
                 gen.ErrorOnManyLines(line1_num, line1_text,
                                      line2_num, line2_text,
@@ -29875,14 +30050,14 @@ def ProcessBlock(line_triples, tr_index, settings_dict,
                 return(None)
     # Store the name of the block and the value of tr_index it starts
     # at.  This is handy for later error messages.
-    block_dict.__setitem__("block_index", (entity_name, UC_name, tr_store))
+    block_dict["block_index"] = (entity_name, UC_name, tr_store)
 
 
     if block_name in ("tunnel",):
         # Write the block_dict to the log file (this is for blocks with
         # entries that are related, so they all appear in the log file
         # together).
-        gen.LogBlock(block_dict, block_name + " " + entity_name, debug1, log)
+        gen.LogBlock(block_dict, f"{block_name} {entity_name}", debug1, log)
     return(entity_name, block_dict)
 
 
@@ -29907,9 +30082,9 @@ def Raise2110(block_name, file_name, key, line_number, line_text, log):
         Errors:
             Aborts with 2110 if a required keyword is not present.
     '''
-    err = ('> Came across a ' + block_name + ' definition\n'
-           '> in "' + file_name + '"\n'
-           '> that lacked a required entry, "' + key + '".\n'
+    err = (f'> Came across a {block_name} definition\n'
+           f'> in "{file_name}"\n'
+           f'> that lacked a required entry, "{key}".\n'
            '> Please add a line to define it.'
           )
     gen.WriteError(2110, err, log)
@@ -29957,15 +30132,16 @@ def CheckForConstant(word, form, settings_dict):
         # It can be turned into a number so it cannot be a constant.
         return(word)
 
-    # First get all the names of constants.
-    names_consts = GetConstantNames(settings_dict)[0]
-
-    # Now check if the value of the key is the name of a constant.
+    # Now check if the value of the key is the name of a constant.  All
+    # constants are stored in the settings dictionary under their name
+    # with a '#' prepended and have a list as their value (the same test
+    # that GetConstantNames uses), so we can look the candidate up
+    # directly instead of building a list of all the constants.
     candidate = '#' + word.lower()
+    is_const = type(settings_dict.get(candidate)) is list
     if debug1:
-        print("Checking for a match to a constant:", candidate, "\n",
-              names_consts, candidate in names_consts)
-    if candidate in names_consts:
+        print("Checking for a match to a constant:", candidate, is_const)
+    if is_const:
         # We have a match.  Return one value or three depending on
         # the value of 'form'.
         # (const_number, value, const_text) = settings_dict[candidate]
@@ -30011,12 +30187,47 @@ def GetConstantNames(settings_dict):
         # All constants have a '#' as the first letter of the key
         # and return a list (so that the line they were defined on
         # can be used in error messages).
-        if key[0] == '#' and type(result) is list:
+        if key.startswith('#') and type(result) is list:
             keys.append(key)
             names.append(key[1:])
     return(keys, names)
 
 
+# A dictionary of the number specifiers that CheckRangeAndSI has already
+# split into their four words.  The keys are the specifier strings (e.g.
+# "float 0+ dist1 a chainage") and the values are tuples of the four
+# words followed by the entry in range_rules for the second word (None
+# if it is "any" or mis-spelled).  This means that each specifier is
+# only taken apart once per run.
+number_specs = {}
+
+
+# The rules for the range checks in CheckRangeAndSI.  The keys are the
+# second word of a number specifier.  The values are a comparison that
+# is True if the number is in range when it is compared to zero, the
+# range in words and the last lines of the error messages for a number
+# on a line and for a constant.  The rule "any" (no range check) is not
+# in the dictionary.  The error numbers (2224 to 2227) are written
+# out in the routine, one per rule, so that the script that checks
+# the error numbers can find them.
+range_rules = {"-":   (operator.lt, "negative",
+                       '> The only valid entries there are negative numbers.',
+                       '> was not negative.'),
+               "-0":  (operator.le, "negative or zero",
+                       '> The only valid entries there are negative numbers\n'
+                       '> or zero.',
+                       '> was positive.'),
+               "0+":  (operator.ge, "positive or zero",
+                       '> The only valid entries there are positive numbers\n'
+                       '> or zero.',
+                       '> was negative.'),
+               "+":   (operator.gt, "positive",
+                       '> The only valid entries there are positive numbers\n'
+                       '> (not negative numbers or zero).',
+                       '> was not positive.'),
+              }
+
+
 def CheckRangeAndSI(word, expected, toSI, err_lines, line_number, line_text,
                     settings_dict, log):
     '''Take a number and a string that defines what its allowable range is
@@ -30093,23 +30304,34 @@ def CheckRangeAndSI(word, expected, toSI, err_lines, line_number, line_text,
     #
     # The fourth entry is a description that we'll use in the error
     #  message, something like "an area" or "a sectype height".
-    words = expected.split(maxsplit = 3)
-    if len(words) != 4:
+    words = number_specs.get(expected)
+    if words is None:
+        words = expected.split(maxsplit = 3)
+        if len(words) == 4:
+            # Intern the three keywords, as they are compared to string
+            # literals and used as dictionary keys every time the
+            # specifier is used.
+            (num_type, rules, convert_key, descrip) = words
+            words = (sys.intern(num_type), sys.intern(rules),
+                     sys.intern(convert_key), descrip,
+                     range_rules.get(rules))
+            number_specs[expected] = words
+    if len(words) != 5:
         # We'll likely run into this one a lot while developing
         # the code.
-        err = ('> Found too few entries in a number specifier in\n'
-               '> CheckRangeAndSI (there should be four).  It\n'
-               '> occurred while processing the file\n'
-               '> "' + file_name + '".\n'
-               + err_lines +
-               '\n> The faulty descriptor was "' + expected + '".\n'
-               '>'
-               )
-        gen.WriteError(1201, err, log)
+        parts = ('> Found too few entries in a number specifier in\n'
+                 '> CheckRangeAndSI (there should be four).  It\n'
+                 '> occurred while processing the file\n'
+                 f'> "{file_name}".\n',
+                 err_lines,
+                 f'\n> The faulty descriptor was "{expected}".\n'
+                 '>'
+                )
+        gen.WriteError(1201, "".join(parts), log)
         gen.OopsIDidItAgain(log, file_name)
         return(None)
     else:
-        (num_type, rules, convert_key, descrip) = words
+        (num_type, rules, convert_key, descrip, range_rule) = words
 
     if debug1:
         print("In CheckRangeAndSI", words, word)
@@ -30119,11 +30341,13 @@ def CheckRangeAndSI(word, expected, toSI, err_lines, line_number, line_text,
         # This word was probably not the name of a constant.  But check
         # if it is the name of a constant that only exists inside looped
         # plots and give a useful error message to the user if it is.
-        if word.lower() == "*time":
+        # Most words are numbers, so we only lowercase the word if it
+        # starts with an asterisk.
+        if word.startswith("*") and word.lower() == "*time":
             # Looks like someone copied the plot commands for a loop and
             # pasted them into a page.
-            err = ('> Came across ' + descrip + ' that was not\n'
-                   '> a valid constant in "' + file_name + '".\n'
+            err = (f'> Came across {descrip} that was not\n'
+                   f'> a valid constant in "{file_name}".\n'
                    '> The constant named "*time" is a special one that\n'
                    '> can only be used inside timeloops.  You probably\n'
                    '> copied and pasted the graph from a loop definition\n'
@@ -30156,24 +30380,24 @@ def CheckRangeAndSI(word, expected, toSI, err_lines, line_number, line_text,
         try:
             number = int(str(word))
         except ValueError:
-            err = ('> Came across ' + descrip + ' that was not\n'
-                   '> an integer in "' + file_name + '".\n'
-                   + err_lines
-                  )
+            parts = [f'> Came across {descrip} that was not\n'
+                     f'> an integer in "{file_name}".\n',
+                     err_lines
+                    ]
             if not constant:
                 # This was a fault on one line.
-                err = err + '.\n> The only valid entries there are integers.'
-                gen.WriteError(2222, err, log)
+                parts.append('.\n> The only valid entries there are integers.')
+                gen.WriteError(2222, "".join(parts), log)
                 gen.ErrorOnLine(line_number, line_text, log, False)
             else:
                 # The fault was in two lines, extend the error
                 # message to include the line setting the constant.
-                err = err + (',\n'
-                       '> referring to a constant of that name which\n'
-                       '> was not an integer. The only valid entries\n'
-                       '> there are integers or integer constants.'
-                      )
-                gen.WriteError(2222, err, log)
+                parts.append(',\n'
+                             '> referring to a constant of that name which\n'
+                             '> was not an integer. The only valid entries\n'
+                             '> there are integers or integer constants.'
+                            )
+                gen.WriteError(2222, "".join(parts), log)
                 gen.ErrorOnTwoLines(const_number, const_text,
                                     line_number, line_text, log, False)
             return(None)
@@ -30181,7 +30405,7 @@ def CheckRangeAndSI(word, expected, toSI, err_lines, line_number, line_text,
         # We expect this entry to be a real number value.  If the number
         # is preceded by a "*", we return the "*" regardless (it means
         # "tell gnuplot to autoscale this axis extent or axis interval").
-        if num_type == "*float" and word[0] == "*":
+        if num_type == "*float" and word.startswith("*"):
             # We are autoscaling an axis extent.  Remove the asterisk
             # and set the autoscale flag.
             autoscale = True
@@ -30194,43 +30418,43 @@ def CheckRangeAndSI(word, expected, toSI, err_lines, line_number, line_text,
         try:
             number = float(word)
         except (TypeError, ValueError):
-            err = ('> Came across ' + descrip + ' that was not\n'
-                   '> a real number in "' + file_name + '".\n'
-                   + err_lines
-                  )
+            parts = [f'> Came across {descrip} that was not\n'
+                     f'> a real number in "{file_name}".\n',
+                     err_lines
+                    ]
             if not constant:
                 if autoscale:
-                    err = (err + '\n> The only valid entries there are real numbers,\n'
+                    parts.append('\n> The only valid entries there are real numbers,\n'
                                  '> real numbers preceded by "*" and constants.\n'
-                                 '> There is not a constant named "' + word + '".')
+                                 f'> There is not a constant named "{word}".')
                 else:
-                    err = (err + '\n> The only valid entries there are real numbers\n'
+                    parts.append('\n> The only valid entries there are real numbers\n'
                                  '> and constants, and there is not a constant named\n'
-                                 '> "' + word + '".')
+                                 f'> "{word}".')
                 # Add a list of the names of the constants that have
                 # been defined, if any have been.
                 const_names = GetConstantNames(settings_dict)[1]
                 if len(const_names) != 0:
-                    err = err + '\n> The following constants are defined:\n'\
-                              + gen.FormatOnLines(const_names)
-                gen.WriteError(2223, err, log)
+                    parts.extend(('\n> The following constants are defined:\n',
+                                  gen.FormatOnLines(const_names)))
+                gen.WriteError(2223, "".join(parts), log)
                 gen.ErrorOnLine(line_number, line_text, log, False)
             else:
                 # The fault was in two lines, extend the error
                 # message.
-                err = err + (',\n'
-                       '> referring to a constant of that name which\n'
-                       '> was not a number. The only valid entries\n'
-                       '> there are real numbers or constants (there\n'
-                       '> are no constants defined).'
-                      )
+                parts.append(',\n'
+                             '> referring to a constant of that name which\n'
+                             '> was not a number. The only valid entries\n'
+                             '> there are real numbers or constants (there\n'
+                             '> are no constants defined).'
+                            )
                 # Add a list of the names of the constants that have
                 # been defined.
                 const_names = GetConstantNames(settings_dict)[1]
                 if len(const_names) != 0:
-                    err = err + '\n> The following constants are defined:\n'\
-                              + gen.FormatOnLines(const_names)
-                gen.WriteError(2223, err, log)
+                    parts.extend(('\n> The following constants are defined:\n',
+                                  gen.FormatOnLines(const_names)))
+                gen.WriteError(2223, "".join(parts), log)
                 gen.ErrorOnTwoLines(const_number, const_text,
                                     line_number, line_text, log, False)
             return(None)
@@ -30253,111 +30477,50 @@ def CheckRangeAndSI(word, expected, toSI, err_lines, line_number, line_text,
         return(None)
 
     # If we get to here it is a suitable number.  Check the range.
-    if rules == "-" and number >= 0:
-        err = ('> Came across ' + descrip + ' that should\n'
-               '> have been negative but was not, in \n'
-               '> "' + file_name + '"\n'
-               + err_lines
-              )
-        if not constant:
-            err = err + '.\n'   \
-                      '> The only valid entries there are negative numbers.'
-            gen.WriteError(2224, err, log)
-            gen.ErrorOnLine(line_number, line_text, log, False)
-        else:
-            # The fault was in two lines, extend the error
-            # message.
-            err = err + ',\n'   \
-                      '> referring to a constant of that name which\n'   \
-                      '> was not negative.'
-
-            gen.WriteError(2224, err, log)
-            gen.ErrorOnTwoLines(line_number, line_text,
-                                const_number, const_text,
-                                log, False)
-        return(None)
-    elif rules == "-0" and number > 0:
-        err = ('> Came across ' + descrip + ' that should\n'
-               '> have been negative or zero but was not, in \n'
-               '> "' + file_name + '".\n'
-               + err_lines
-              )
-        if not constant:
-            err = (err + '.\n'
-                   '> The only valid entries there are negative numbers\n'
-                   '> or zero.'
-                  )
-            gen.WriteError(2225, err, log)
-            gen.ErrorOnLine(line_number, line_text, log, False)
-        else:
-            # The fault was in two lines, extend the error
-            # message.
-            err = (err + ',\n'
-                   '> referring to a constant of that name which\n'
-                   '> was positive.'
-                  )
-            gen.WriteError(2225, err, log)
-            gen.ErrorOnTwoLines(const_number, const_text,
-                                line_number, line_text, log, False)
-        return(None)
-    elif rules == "0+" and number < 0:
-        err = ('> Came across ' + descrip + ' that should\n'
-               '> have been positive or zero but was not, in \n'
-               '> "' + file_name + '".\n'
-               + err_lines
-              )
-        if not constant:
-            err = (err + '.\n'
-                   '> The only valid entries there are positive numbers\n'
-                   '> or zero.'
-                  )
-            gen.WriteError(2226, err, log)
-            gen.ErrorOnLine(line_number, line_text, log, False)
-        else:
-            # The fault was in two lines, extend the error
-            # message.
-            err = (err + ',\n'
-                   '> referring to a constant of that name which\n'
-                   '> was negative.'
-                  )
-            gen.WriteError(2226, err, log)
-            gen.ErrorOnTwoLines(const_number, const_text,
-                                line_number, line_text, log, False)
-        return(None)
-    elif rules == "+" and number <= 0:
-        err = ('> Came across ' + descrip + ' that should\n'
-               '> have been positive but was not, in \n'
-               '> "' + file_name + '".\n'
-               + err_lines
-              )
-        if not constant:
-            err = (err + '.\n'
-                   '> The only valid entries there are positive numbers\n'
-                   '> (not negative numbers or zero).'
-                  )
-            gen.WriteError(2227, err, log)
-            gen.ErrorOnLine(line_number, line_text, log, False)
-        else:
-            # The fault was in two lines, extend the error
-            # message.
-            err = (err + ',\n'
-                   '> referring to a constant of that name which\n'
-                   '> was not positive.'
-                  )
-            gen.WriteError(2227, err, log)
-            gen.ErrorOnTwoLines(const_number, const_text,
-                                line_number, line_text, log, False)
-        return(None)
-    elif rules not in ("-", "-0", "0+", "+", "any"):
+    if rules == "any":
+        # There is no range check to do.
+        pass
+    elif range_rule is not None:
+        (in_range, adjective, line_end, const_end) = range_rule
+        if not in_range(number, 0):
+            parts = [f'> Came across {descrip} that should\n'
+                     f'> have been {adjective} but was not, in \n'
+                     f'> "{file_name}".\n',
+                     err_lines
+                    ]
+            if not constant:
+                parts.extend(('.\n', line_end))
+            else:
+                # The fault was in two lines, extend the error
+                # message.
+                parts.extend((',\n'
+                              '> referring to a constant of that name which\n',
+                              const_end))
+            err = "".join(parts)
+            if rules == "-":
+                gen.WriteError(2224, err, log)
+            elif rules == "-0":
+                gen.WriteError(2225, err, log)
+            elif rules == "0+":
+                gen.WriteError(2226, err, log)
+            else:
+                gen.WriteError(2227, err, log)
+            if not constant:
+                gen.ErrorOnLine(line_number, line_text, log, False)
+            else:
+                gen.ErrorOnTwoLines(const_number, const_text,
+                                    line_number, line_text, log, False)
+            return(None)
+    else:
         # We'll likely run into this one occasionally while developing
         # the code.
-        err = ('> Found an invalid range testing rule in CheckRangeAndSI\n'
-               '> while processing "' + file_name + '".\n'
-               + err_lines +
-               '\n> The faulty descriptor was "' + expected + '".\n'
-               '>'
-               )
-        gen.WriteError(1203, err, log)
+        parts = ('> Found an invalid range testing rule in CheckRangeAndSI\n'
+                 f'> while processing "{file_name}".\n',
+                 err_lines,
+                 f'\n> The faulty descriptor was "{expected}".\n'
+                 '>'
+                )
+        gen.WriteError(1203, "".join(parts), log)
         gen.OopsIDidItAgain(log, file_name)
         return(None)
 
@@ -30389,6 +30552,72 @@ def CheckRangeAndSI(word, expected, toSI, err_lines, line_number, line_text,
     return(number)
 
 
+# Some block types do not need a name after the noun, such as "begin plots".
+# Some do, such as "begin tunnel 101".  We make lists of those that do and
+# those that do not need a name for the syntax checks.  We keep these as
+# lists so that they are not confused with the tuples returned by
+# ProcessBlock.  They are the same for every file, so we build them once
+# here and ProcessFile adds copies of them to each file's settings
+# dictionary.
+named_blocks = ["tunnel", "route", "data", "files", "fanchar", "traintype",
+                "schedule", "tunnelclones", "trafficsteady", "gradients",
+                # For the entries in the next line we allow a name so that
+                # the "ignore" keyword is treated as a name and is processed
+                # correctly.
+                "page", "timeloop", "filesloop", "graph", "image",
+               ]
+unnamed_blocks = ["settings", "testblock", "constants", "plotcontrol",
+                  "sectypes", "gradients", "elevations", "heights",
+                  "tunnels", # Routes have lists of tunnels in them
+                  "speedlimits", "lanes", "radii", "sectors", "coasting",
+                  "regenfractions",
+                  "sub_testblock", "traffictypes", "jetfantypes",
+                  "plots", "verbatim", "csv", "image",
+                  "page", "timeloop", "filesloop", "graph", "image",
+                  "nicknames", "exclude", "sesdata"
+                 ]
+duplicable_blocks = ["testblock", "constants", "sectypes",
+                     "page", "graph", "timeloop", "filesloop",
+                     "verbatim", "data", "image", "fanchar",
+                     "schedule", "tunnelclones",
+                     "trafficsteady", "sesdata"
+                    ]
+# The code below gets a list of the blocks that cannot be duplicated.
+# [name for name in named_blocks + unnamed_blocks
+#       if name not in duplicable_blocks]
+
+# The syntax checks test which of the lists above the block names are in
+# once per line, so we give them frozensets of the same names.
+named_set = frozenset(named_blocks)
+unnamed_set = frozenset(unnamed_blocks)
+duplicable_set = frozenset(duplicable_blocks)
+
+# Make dictionaries of which block names can contain other blocks.
+# If a block does not appear in this dictionary then other blocks
+# cannot be nested within blocks of that type.
+nestable_blocks = {"route": ("tunnels", "elevations", "gradients",
+                             "schedule", "speedlimits", "lanes",
+                             "radii", "sectors", "coasting",
+                             "regenfractions",),
+                   "plots": ("page", "timeloop", "filesloop"),
+                   "page": ("graph", "image"),
+                   "timeloop": ("graph", "image", "verbatim"),
+                   "filesloop": ("nicknames", "exclude", "graph",
+                                 "image", "verbatim"),
+                   "graph": ("verbatim", "sub_testblock"),
+                   "testblock": ("sub_testblock",),
+                   "image": ("verbatim",),
+                  }
+# Finally, a few words are reserved and can't be used for things
+# like file nicknames or route names.  ProcessFile adds them to the
+# settings dictionary.
+reserved_words = ["calc", "begin", "end",
+                  "title", "xlabel", "ylabel", "x2label", "y2label",
+                  "xrange", "yrange", "x2range", "y2range",
+                  "margins", "verbatim", "data", "allroutes",
+                 ]
+
+
 def ProcessFile( arguments ):
     '''
     Take a file name and a file index and process the file.  We do a few
@@ -30439,10 +30668,10 @@ def ProcessFile( arguments ):
         print("\n> Processing file " + str(file_num) + " of "
               + str(file_count) + ', "' + file_name + '".\n>')
 
-    settings_dict.__setitem__("file_name", file_name)
-    settings_dict.__setitem__("dir_name", dir_name)
-    settings_dict.__setitem__("file_stem", file_stem)
-    settings_dict.__setitem__("file_ext", file_ext)
+    settings_dict["file_name"] = file_name
+    settings_dict["dir_name"] = dir_name
+    settings_dict["file_stem"] = file_stem
+    settings_dict["file_ext"] = file_ext
 
     # Ensure the file extension is .txt.
     if file_ext.lower() != ".txt":
@@ -30465,30 +30694,33 @@ def ProcessFile( arguments ):
         return()
 
     # If we get to here, the file name did end in .txt.
-    # Check if the file exists.  If it does, check that we have
-    # permission to read it.  Fail if the file doesn't exist
-    # or if we don't have access.
-    if os.access(dir_name + file_name, os.F_OK):
-        # The file exists.
-        try:
-            inp = open(dir_name + file_name, 'r', encoding='utf-8')
-        except PermissionError:
-            print('> *Error* type 2002 ******************************\n'
-                  '> Skipping "' + file_name + '", because you\n'
-                  "> do not have permission to read it.")
-            gen.PauseIfLast(file_num, file_count)
-            return()
-        else:
-            # Load the lines in the file into a list of strings.
-            file_contents = inp.readlines()
-            inp.close()
-    else:
+    # Try to open the file.  Fail if the file doesn't exist
+    # or if we don't have permission to read it.
+    try:
+        inp = open(dir_name + file_name, 'r', encoding='utf-8')
+    except FileNotFoundError:
         print('> *Error* type 2003 ******************************\n'
               '> Skipping "' + file_name + '" in folder\n'
               '> "' + dir_name + '", because it\n'
               "> doesn't exist.")
         gen.PauseIfLast(file_num, file_count)
         return()
+    except PermissionError:
+        print('> *Error* type 2002 ******************************\n'
+              '> Skipping "' + file_name + '", because you\n'
+              "> do not have permission to read it.")
+        gen.PauseIfLast(file_num, file_count)
+        return()
+    else:
+        # Load the lines in the file into a list of strings.  We
+        # read the whole file in one call and split it into lines
+        # afterwards, which is quicker than reading it line by line.
+        # We split on "\n" only (text mode has already turned "\r\n"
+        # into "\n").  splitlines() would also split on form feeds
+        # and other odd characters, which would throw the line numbers
+        # in the error messages out.
+        with inp:
+            file_contents = inp.read().split("\n")
 
     # Create a logfile to hold observations and debug entries.
     # We create a subfolder of ancillary files to hold the logfiles
@@ -30499,21 +30731,24 @@ def ProcessFile( arguments ):
 #    doesn't work for me.
 #    pathlib.Path.mkdir(dir_name + "ancillaries", exist_ok = True)
 #
-    if not os.access(dir_name + "ancillaries", os.F_OK):
-        try:
-            os.mkdir(dir_name + "ancillaries")
-        except PermissionError:
-            print('> *Error* type 2004 ******************************\n'
-                  '> Skipping "' + file_name + '", because it\n'
-                  "> is in a folder where you do not have permission\n"
-                  '> to create the required "ancillaries" subfolder.')
-            gen.PauseIfLast(file_num, file_count)
-            return()
+    try:
+        os.mkdir(dir_name + "ancillaries")
+    except FileExistsError:
+        # We already have an "ancillaries" subfolder.
+        pass
+    except PermissionError:
+        print('> *Error* type 2004 ******************************\n'
+              '> Skipping "' + file_name + '", because it\n'
+              "> is in a folder where you do not have permission\n"
+              '> to create the required "ancillaries" subfolder.')
+        gen.PauseIfLast(file_num, file_count)
+        return()
 
-    # Now try to create the logfile.
+    # Now try to create the logfile.  We write to it in many small
+    # pieces, so we give it a larger buffer than the default.
     log_name = dir_name + "ancillaries/" + file_stem + ".log"
     try:
-        log = open(log_name, 'w', encoding='utf-8')
+        log = open(log_name, 'w', buffering=65536, encoding='utf-8')
     except PermissionError:
         print('> *Error* type 2005 ******************************\n'
               '> Skipping "' + file_name + '", because you\n'
@@ -30527,17 +30762,12 @@ def ProcessFile( arguments ):
                   '  using ' + script_name +
                   ', run at ' + when_who + '.\n')
 
-    # Try to import the pandas and numpy libraries.  If they aren't
-    # installed on this machine then write a message to the screen
-    # and to the logfile.
-    try:
-        package_name = "numpy"
-        import numpy as np
-        package_name = "pandas"
-        import pandas as pd
-    except ModuleNotFoundError:
+    # Check that the pandas and numpy libraries were imported at the
+    # top level.  If they aren't installed on this machine then write
+    # a message to the screen and to the logfile.
+    if missing_package is not None:
         err = ("> Ugh, can't process this run because Python's\n"
-               '> ' + package_name + ' library is not installed.\n'
+               '> ' + missing_package + ' library is not installed.\n'
                '> If you are fortunate enough to have an IT\n'
                '> department, please ask them to install it for\n'
                '> you then try again.  If you do not have an IT\n'
@@ -30549,78 +30779,27 @@ def ProcessFile( arguments ):
                '> more details.'
               )
         gen.WriteError(2006, err, log)
+        log.close()
         return(None)
 
+    # Add the lists of block names and reserved words to the settings
+    # dictionary so we don't have to bother passing them.  Each file
+    # gets its own copies, so that nothing done to them while processing
+    # one file can leak into the next file in a serial run.
+    settings_dict["named"] = list(named_blocks)
+    settings_dict["unnamed"] = list(unnamed_blocks)
+    settings_dict["duplicables"] = list(duplicable_blocks)
+    settings_dict["reserved"] = list(reserved_words)
+
     # Check the file for valid begin <block>...end <block> syntax.   If we
     # have a problem the routine will return None.  If all is well, it
     # will return a list holding the lines of formal comment at the top of
     # the file and all the lines between "begin settings" and "end plots".
     # Everything after the "end plots" is ignored (so we can store blocks
     # of unused input there).
-
-    # Some block types do not need a name after the noun, such as "begin plots".
-    # Some do, such as "begin tunnel 101".  We make a list of those that do
-    # not need a name for the check.  We keep these as lists so that they
-    # are not confused with the tuples returned by ProcessBlock.
-    named = ["tunnel", "route", "data", "files", "fanchar", "traintype",
-             "schedule", "tunnelclones", "trafficsteady", "gradients",
-             # For the entries in the next line we allow a name so that
-             # the "ignore" keyword is treated as a name and is processed
-             # correctly.
-             "page", "timeloop", "filesloop", "graph", "image",
-            ]
-    unnamed = ["settings", "testblock", "constants", "plotcontrol",
-               "sectypes", "gradients", "elevations", "heights",
-               "tunnels", # Routes have lists of tunnels in them
-               "speedlimits", "lanes", "radii", "sectors", "coasting",
-               "regenfractions",
-               "sub_testblock", "traffictypes", "jetfantypes",
-               "plots", "verbatim", "csv", "image",
-               "page", "timeloop", "filesloop", "graph", "image",
-               "nicknames", "exclude", "sesdata"
-              ]
-    duplicables = ["testblock", "constants", "sectypes",
-                   "page", "graph", "timeloop", "filesloop",
-                   "verbatim", "data", "image", "fanchar",
-                   "schedule", "tunnelclones",
-                   "trafficsteady", "sesdata"
-                  ]
-    # The code below gets a list of the blocks that cannot be duplicated.
-    # [name for name in named+unnamed if name not in duplicables]
-    # Make dictionaries of which block names can contain other blocks.
-    # If a block does not appear in this dictionary then other blocks
-    # cannot be nested within blocks of that type.
-    nestables = {"route": ("tunnels", "elevations", "gradients",
-                           "schedule", "speedlimits", "lanes",
-                           "radii", "sectors", "coasting",
-                           "regenfractions",),
-                 "plots": ("page", "timeloop", "filesloop"),
-                 "page": ("graph", "image"),
-                 "timeloop": ("graph", "image", "verbatim"),
-                 "filesloop": ("nicknames", "exclude", "graph",
-                               "image", "verbatim"),
-                 "graph": ("verbatim", "sub_testblock"),
-                 "testblock": ("sub_testblock",),
-                 "image": ("verbatim",),
-                }
-    # Finally, a few words are reserved and can't be used for things
-    # like file nicknames or route names.  Add them to the settings
-    # dictionary.
-    reserved = ["calc", "begin", "end",
-                "title", "xlabel", "ylabel", "x2label", "y2label",
-                "xrange", "yrange", "x2range", "y2range",
-                "margins", "verbatim", "data", "allroutes",
-               ]
-    # Now add those lists to the settings dictionary so we don't
-    # have to bother passing them.
-    settings_dict.__setitem__("named", named)
-    settings_dict.__setitem__("unnamed", unnamed)
-    settings_dict.__setitem__("duplicables", duplicables)
-    settings_dict.__setitem__("reserved", reserved)
-
-
-    result = syntax.CheckSyntax(file_contents, file_name, unnamed, named,
-                                duplicables, nestables, "Hobyah", log, debug1)
+    result = syntax.CheckSyntax(file_contents, file_name, unnamed_set,
+                                named_set, duplicable_set,
+                                nestable_blocks, "Hobyah", log, debug1)
 
     if result is None:
         # The begin...end syntax was not valid.  The routine
@@ -30655,8 +30834,12 @@ def ProcessFile( arguments ):
             print("Top level blocks are as follows:")
             for entry in begin_lines:
                 print("  ", entry, line_triples[entry][:2])
+        # Sort the top-level blocks by block name once, so that each
+        # check for "begin constants", "begin plots" etc. below is a
+        # dictionary lookup rather than another walk of begin_lines.
+        begin_index = IndexBegins(line_triples, begin_lines)
 
-    settings_dict.__setitem__("file_comments", comments)
+    settings_dict["file_comments"] = comments
     # If we get to here we know that there are no duplicate names
     # in the blocks at each level, that all the blocks have matching
     # begin...end entries and are correctly nested.  We know that
@@ -30677,7 +30860,7 @@ def ProcessFile( arguments ):
     else:
         # Add the run settings to the settings dictionary.
         for key in result:
-            settings_dict.__setitem__(key, result[key])
+            settings_dict[key] = result[key]
 
 
     # We now have the settings.  We look for blocks defining constants.
@@ -30686,8 +30869,8 @@ def ProcessFile( arguments ):
     # Note that we do this at this level so that we can use constants
     # in files used for plotting only as well as files used for
     # calculations.
-    result = GetBegins(line_triples, begin_lines, "constants",
-                       0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("constants", []),
+                             "constants", 0, math.inf, file_name, log)
     if result is None:
         log.close()
         gen.PauseIfLast(file_num, file_count)
@@ -30696,28 +30879,11 @@ def ProcessFile( arguments ):
     if debug1:
         print("Processing constants", result, type(result))
     for tr_index in result:
-        result = ProcessConstants(line_triples, tr_index, constants_dict,
-                                  settings_dict, log)
-        if result is None:
+        if ProcessConstants(line_triples, tr_index, constants_dict,
+                            settings_dict, log) is None:
             log.close()
             gen.PauseIfLast(file_num, file_count)
             return(None)
-        else:
-            constants_dict = result
-    # Now we add the constants to the settings dictionary.  When we
-    # set the keys of the constants we prepend a '#' character to
-    # the key so that we can avoid name conflicts with the dictionary
-    # keys that were defined in the "settings" block.
-    #
-    # Note that we don't need to check for duplicates.  If there were
-    # any duplicates, error 2106 would have already been raised.
-    for key in constants_dict:
-        value = constants_dict[key]
-        new_key = "#" + key.lower()
-        # Build a list of the line number, the value and the line text.
-        (const_number, discard, const_text) = line_triples[value[-1]]
-        constant = [value[0], const_text, const_number]
-        settings_dict.__setitem__(new_key, constant)
 
 
     # Now we seek the blocks that contain the user's blocks of data.
@@ -30727,8 +30893,8 @@ def ProcessFile( arguments ):
     #
     if debug1:
         print("Processing userdata", result, type(result))
-    result = GetBegins(line_triples, begin_lines, "data",
-                       0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("data", []),
+                             "data", 0, math.inf, file_name, log)
     if result is None:
         log.close()
         gen.PauseIfLast(file_num, file_count)
@@ -30748,7 +30914,7 @@ def ProcessFile( arguments ):
             return(None)
         else:
             (block_name, data_list) = result
-            user_data_dict.__setitem__(block_name, data_list)
+            user_data_dict[block_name] = data_list
         if debug1:
             print(block_name, data_list)
 
@@ -30758,8 +30924,8 @@ def ProcessFile( arguments ):
     # as if it were a data block.
     if debug1:
         print("Processing csv", result, type(result))
-    result = GetBegins(line_triples, begin_lines, "csv",
-                       0, 1, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("csv", []),
+                             "csv", 0, 1, file_name, log)
     if result is None:
         log.close()
         gen.PauseIfLast(file_num, file_count)
@@ -30782,7 +30948,7 @@ def ProcessFile( arguments ):
                 user_data_dict.update(result)
 
     # Store the blocks of user data and .csv data in the settings dictionary.
-    settings_dict.__setitem__("user_data", user_data_dict)
+    settings_dict["user_data"] = user_data_dict
 
     if debug1:
         print("User data:", user_data_dict)
@@ -30792,7 +30958,7 @@ def ProcessFile( arguments ):
         settings_dict["nocalc"] is False):
             if debug1:
                 print("Processing calculation")
-            result = ProcessCalc(line_triples, begin_lines, settings_dict, log)
+            result = ProcessCalc(line_triples, begin_index, settings_dict, log)
             if result is None:
                 # Something went wrong.  Go back to main().
                 log.close()
@@ -30806,9 +30972,10 @@ def ProcessFile( arguments ):
     # files we want to plot, the "begin files...end files" block.
     # This block may or may not exist: we may be plotting only
     # results from this calculation or user-specified data.
-    result = GetBegins(line_triples, begin_lines, "files",
-                       0, 1, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("files", []),
+                             "files", 0, 1, file_name, log)
     if result is None:
+        log.close()
         return(None)
     elif result == []:
         # We had no "begin files" block in this input file.  Spoof
@@ -30830,24 +30997,26 @@ def ProcessFile( arguments ):
     # We may have just run a calculation and written an output file,
     # or we may have already run one and have a binary file we can
     # use.  Or this file may only be for plotting and not have a
-    # binary file at all.
+    # binary file at all.  The binary file is written alongside the
+    # input file (see ProcessCalc), so we look for it in the input
+    # file's folder, not in the current working directory.
     bin_name = file_stem + ".hbn"
-    contents = clHobyah.Hobyahdata("", bin_name, log, False)
+    contents = clHobyah.Hobyahdata(dir_name, bin_name, log, False)
     # If there is a binary file associated with this Hobyah file
     # then 'contents' holds everything in the file.  If there is
     # not a binary file then it only contains one entry, which is
     # contents.success = None or contents.success = False (both
     # results may be returned by failures).
     if contents.success is True:
-        files_dict.__setitem__("calc", (bin_name, contents))
+        files_dict["calc"] = (bin_name, contents)
 
 
     # Check if we need to generate any SES input files from the
     # Hobyah file.  A new SES input file based on the geometry of
     # the Hobyah run is generated by each "SESdata" block.
     SESfiles = {}
-    result = GetBegins(line_triples, begin_lines, "sesdata",
-                       0, math.inf, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("sesdata", []),
+                             "sesdata", 0, math.inf, file_name, log)
     if result is None:
         log.close()
         gen.PauseIfLast(file_num, file_count)
@@ -30866,8 +31035,8 @@ def ProcessFile( arguments ):
             # SES input.
 
     # Now find out where the plotting block is.
-    result = GetBegins(line_triples, begin_lines, "plots",
-                       1, 1, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("plots", []),
+                             "plots", 1, 1, file_name, log)
     if result is None:
         log.close()
         gen.PauseIfLast(file_num, file_count)
@@ -30894,8 +31063,8 @@ def ProcessFile( arguments ):
 
     if debug1:
         print("> Processing testblock")
-    result = GetBegins(line_triples, begin_lines, "testblock",
-                       0, 2, file_name, debug1, log)
+    result = CheckBeginCount(line_triples, begin_index.get("testblock", []),
+                             "testblock", 0, 2, file_name, log)
     if type(result) is list and len(result) != 0:
         # We do have a testblock.  Process it (it will likely return
         # an error but we don't really care, that is its purpose).
@@ -30904,10 +31073,10 @@ def ProcessFile( arguments ):
         if len(result) == 2:
             # One of the files we are using to process test blocks has
             # two testblocks in it.  We use this to trip error 2064
-            # by making another call to GetBegins looking for more
-            # than one block.
-            result = GetBegins(line_triples, begin_lines, "testblock",
-                               3, 3, file_name, debug1, log)
+            # by making another call to CheckBeginCount looking for
+            # more than one block.
+            result = CheckBeginCount(line_triples, result, "testblock",
+                                     3, 3, file_name, log)
     # We completed with no failures, return to main() and
     # process the next file.
     if show_errors:
@@ -31084,10 +31253,13 @@ def main():
             for args in runargs:
                 ProcessFile(args)
         else:
-            # Run them all in parallel, using as many cores as are available.
-            corestouse = multiprocessing.cpu_count()
-            my_pool = multiprocessing.Pool(processes = corestouse)
-            my_pool.map(ProcessFile,runargs)
+            # Run them all in parallel, using as many cores as are available
+            # but not starting more processes than there are files.  The
+            # "with" block shuts the worker processes down once they are
+            # all finished.
+            corestouse = min(multiprocessing.cpu_count(), file_count)
+            with multiprocessing.Pool(processes = corestouse) as my_pool:
+                my_pool.map(ProcessFile, runargs)
     else:
         # We only have one file to process.  Best to not bother with
         # the overhead the multiprocessing library adds.
@@ -59,14 +59,11 @@ import datetime
 import re
 import pathlib         # Supersedes some functions in module 'os', apparently
 import multiprocessing
-
-try:
-    import numpy as np
-    import pandas as pd
-except (ModuleNotFoundError, ImportError):
-    # If they aren't installed we pass.  We reload them later (after the
-    # first log file is open) and write the complaint to the logfile.
-    pass
+# Note that numpy and pandas are not imported here.  They take a while
+# to load and they are only needed in Form8 and ReadTimeSteps, so we
+# import them there.  This means that the parent process in a parallel
+# run (which doesn't convert any files itself) and runs that fail early
+# don't pay for loading them.
 
 
 def main():
@@ -244,10 +241,17 @@ def main():
                 if result is None:
                     gen.PauseIfLast(index + 1, file_count)
         else:
-            # Run them all in parallel, using as many cores as are available.
-            corestouse = multiprocessing.cpu_count()
-            my_pool = multiprocessing.Pool(processes = corestouse)
-            my_pool.map(ProcessFile,runargs)
+            # Run them all in parallel, using as many cores as are available
+            # but not starting more processes than there are files.  We
+            # hand the files out one at a time (chunksize = 1), so a core
+            # that finishes a small file picks up the next one instead of
+            # waiting for a batch.  We use map() because it doesn't return
+            # until every file has been tried, even if one of them raised
+            # an exception.  The "with" block shuts the worker processes
+            # down once they are all finished.
+            corestouse = min(multiprocessing.cpu_count(), file_count)
+            with multiprocessing.Pool(processes = corestouse) as my_pool:
+                my_pool.map(ProcessFile, runargs, chunksize = 1)
     else:
         # We only have one output file to process.  Best not to bother with
         # the time it takes to import the multiprocessing library and the
@@ -311,7 +315,7 @@ def IsOpenSESLicence(line):
         Returns:
             Boolean True if it is, False otherwise.
     '''
-    return(line.rstrip()[-56:] == "Engineers of the OpenSES Agreement. All rights reserved.")
+    return(line.rstrip().endswith("Engineers of the OpenSES Agreement. All rights reserved."))
 
 
 def OkLine(line):
@@ -344,9 +348,12 @@ def SkipManyLines(line_triples, tr_index, debug1, out):
         Returns:
             tr_index        int,       Where to start reading the next form
     '''
-    # Now skip over any lines up to the start of the next form.
+    # Now skip over any lines up to the start of the next form.  We
+    # collect the lines we skip over and write them all to the output
+    # file in one go at the end.
     line_text = ""
     tr_index_store = tr_index
+    skipped = []
     while tr_index != len(line_triples):
         line_text = line_triples[tr_index][1]
         if debug1:
@@ -358,11 +365,20 @@ def SkipManyLines(line_triples, tr_index, debug1, out):
         else:
             if tr_index != tr_index_store:
                 # If this isn't the last line in the previous form, print it
-                gen.WriteOut(line_text, out)
+                skipped.append(line_text)
             tr_index += 1
+    if skipped:
+        gen.WriteOut("\n".join(skipped), out)
     return(tr_index)
 
 
+# A set of the version lines of SES that FilterJunk accepts in a .TMP file
+# with no header.  It does not include OpenSES (OpenSES files are
+# recognised by their licence text instead).
+ver_allowed = frozenset(("VERSION 4.10", "VERSION 204.1", "VERSION 204.2",
+                         "VERSION 204.3", "VERSION 204.4", "VERSION 204.5"))
+
+
 def FilterJunk(file_conts, file_name, log, debug1):
     '''Read in a list of lines (file_conts) and strip out all the
     blank lines, header lines, form feeds and footer lines.  It also
@@ -511,11 +527,8 @@ def FilterJunk(file_conts, file_name, log, debug1):
         #    VERSION 4.10
         # in the first 60 lines of the file.  We don't just jump to the
         # relevant lines as future versions may have fewer blank lines.
-
-        # Create a list of allowed versions of SES that does not include
-        # OpenSES (these have already been handled above).
-        ver_allowed = ("VERSION 4.10", "VERSION 204.1", "VERSION 204.2",
-                       "VERSION 204.3", "VERSION 204.4", "VERSION 204.5", )
+        # The allowed version lines are in the module-level set
+        # "ver_allowed".
 
         # Set some Booleans to indicate which lines we have found.  This
         # is a bit of an ugly hack, but it works.
@@ -583,23 +596,20 @@ def FilterJunk(file_conts, file_name, log, debug1):
             padded_name = source_name + " " * (73    - len(source_name))
 
             # Figure out the date and time that the .TMP file was converted,
-            # in the same format that SES used.
-            iso_date = datetime.datetime.now().isoformat()
-            year = iso_date[:4]
-            month = int(iso_date[5:7])
-            day = format(int(iso_date[8:10]), "02d")
-            month_dict = {1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr",
-                         5: "May", 6: "Jun", 7: "Jul", 8: "Aug", 9: "Sep",
-                         10: "Oct", 11: "Nov", 12: "Dec"}
-            month_text = month_dict[month]
-            date = (str(day) + " " + month_text + " " + year +
-                    " " + iso_date[11:19])
+            # in the same format that SES used, e.g. "20 Apr 2021 20:24:18".
+            # We never call locale.setlocale, so "%b" gives the English
+            # abbreviation of the month.
+            date = datetime.datetime.now().strftime("%d %b %Y %H:%M:%S")
             footer = "File: " + padded_name + "Conversion timestamp: " + date
 
     # Now get all the lines that are not printer control sequences, comments,
-    # headers, footers, form feeds or blank.
-    line_pairs = [(index,line) for index, line in
-                    enumerate(file_conts, start=1) if OkLine(line)
+    # headers, footers, form feeds or blank.  Most lines are too short to
+    # be a header or a footer (a footer has text up to the 101st character
+    # and a header up to the 117th), so we only call OkLine for the long
+    # ones.  This saves three function calls on most lines of the file.
+    line_pairs = [(index, line) for index, line in
+                    enumerate(file_conts, start=1)
+                    if line and (len(line) < 101 or OkLine(line))
                  ]
     # The routine returns a list of tuples: each tuple has the line number
     # and the contents of the line.  The line numbers start at one (not zero)
@@ -1027,6 +1037,10 @@ def FilterErrors(line_pairs, errors, log, debug1):
             line_triples [(int,str,Bool)],   A list of tuples (line no., line
                                              text, True if not an error line)
             errors       [str],         A list of all the errors in the file.
+
+        Errors:
+            Aborts with 8021 if an SES error message has an error number
+            that is not in 'inp_errs' or 'sim_errs'.
     '''
 
     # Initialise some arrays and counters.
@@ -1047,10 +1061,16 @@ def FilterErrors(line_pairs, errors, log, debug1):
     # output file.
     input_crash = True
 
+    # Set a Boolean that we set True once we have added the bad news
+    # about subroutine HEATUP to run_state (when Heatup.for starts
+    # complaining it usually complains multiple times, but we only
+    # want to say it once).
+    heatup_failed = False
+
     # Run through all the lines of text and catch lines of error messages.
-    while index1 < len(line_pairs):
-        line_num = line_pairs[index1][0]
-        line_text = line_pairs[index1][1]
+    line_count = len(line_pairs)
+    while index1 < line_count:
+        line_num, line_text = line_pairs[index1]
         if "*ERROR* TYPE" in line_text:
             # It is a line of error.  This is fragile in the sense that
             # it can be spoofed by people putting that exact text in
@@ -1063,11 +1083,23 @@ def FilterErrors(line_pairs, errors, log, debug1):
             errs_found += 1
             if "SIMULATION *ERROR*" in line_text:
                 err_num = int(line_text.split()[3])
-                (lines_back, lines_fwd, fatal)  = sim_errs[err_num]
+                err_data = sim_errs.get(err_num)
             else:
                 # An input error.
                 err_num = int(line_text.split()[2])
-                (lines_back, lines_fwd, fatal)  = inp_errs[err_num]
+                err_data = inp_errs.get(err_num)
+            if err_data is None:
+                # We don't know how many lines this error message has
+                # so we can't step over it.  Complain.
+                err = ('> Found an SES error message that this converter\n'
+                       '> does not know about on line ' + str(line_num)
+                         + ' of the output file:\n'
+                       '>   ' + line_text.strip() + '\n'
+                       '> Please raise a bug report so that the program\n'
+                       '> can be updated to deal with the new error.')
+                gen.WriteError(8021, err, log)
+                return(None)
+            (lines_back, lines_fwd, fatal) = err_data
         elif "THE NUMBER OF CRITICAL POINTS" in line_text:
             # These are not formal error messages but they do turn up
             # as well and are bad news (it means that hot smoke reversed
@@ -1083,17 +1115,11 @@ def FilterErrors(line_pairs, errors, log, debug1):
             errs_found += 1
 
             # Check if an earlier bad news message about the wall temperatures
-            # being fouled up has been added to run_state (when Heatup.for
-            # starts complaining it usually complains multiple times).
-            # If not, add it.
-            crit_fail = True
-            for err_line in run_state:
-                if "SUBROUTINE HEATUP" in err_line:
-                    crit_fail = False
-                    break
-            if crit_fail:
+            # being fouled up has been added to run_state.  If not, add it.
+            if not heatup_failed:
                 run_state.append("Subroutine HEATUP gave up trying to calculate"
                                  " wall temperature - the run is invalid.")
+                heatup_failed = True
         else:
             valid = True
 
@@ -1117,47 +1143,49 @@ def FilterErrors(line_pairs, errors, log, debug1):
             # we initialize three Booleans here.  First is "Did it make it
             # as far reading all the input?", second is "Did it run (start
             # calculating)?", third is, "Did it fail due to a simulation error?".
-            if "IS TO PROCEED." in line_text:
-                # We now know that the run read all the input and tried
-                # to start calculating.
-                run_state.append("SES read all the input and "
-                                 "started the calculation.")
-                input_crash = False
-            elif "SUPRESSED AT THE USER" in line_text:
-                # The run was suppressed by the user.
-                run_state.append("SES read all the input but "
-                                 "you told it not to run.")
-                input_crash = False
-            elif "SUPRESSED BY" in line_text:
-                # The run was suppressed by input errors.
-                run_state.append("The run failed due to input errors, "
-                                 "but will be processed as far as possible.")
-                input_crash = False
-            elif "END OF SIMULATION" in line_text:
-                run_state.append("The run finished at the intended time "
-                                 "and will be processed.")
-            elif "THIS SIMULATION IS TERMINATED" in line_text:
-                run_state.append("The run finished early due to errors, "
-                                 "but will be processed as far as possible.")
+            # All the lines we are looking for have "SIMULATION" in them,
+            # so we test for that first.  Most lines then get one
+            # substring test instead of five.
+            if "SIMULATION" in line_text:
+                if "IS TO PROCEED." in line_text:
+                    # We now know that the run read all the input and tried
+                    # to start calculating.
+                    run_state.append("SES read all the input and "
+                                     "started the calculation.")
+                    input_crash = False
+                elif "SUPRESSED AT THE USER" in line_text:
+                    # The run was suppressed by the user.
+                    run_state.append("SES read all the input but "
+                                     "you told it not to run.")
+                    input_crash = False
+                elif "SUPRESSED BY" in line_text:
+                    # The run was suppressed by input errors.
+                    run_state.append("The run failed due to input errors, "
+                                     "but will be processed as far as possible.")
+                    input_crash = False
+                elif "END OF SIMULATION" in line_text:
+                    run_state.append("The run finished at the intended time "
+                                     "and will be processed.")
+                elif "THIS SIMULATION IS TERMINATED" in line_text:
+                    run_state.append("The run finished early due to errors, "
+                                     "but will be processed as far as possible.")
         else:
             # This is an error message.  Check if it had a line of
             # error message before the line containing "*ERROR*".
             if lines_back != 0:
                 # We have a line of error message prepended (there
                 # is never more than one line prepended, as far as
-                # I know).  Remove it and replace it with the
-                # Boolean changed it from True to False, then write
-                # it to the log file
-                last_line = line_triples.pop()
-                replacement = (last_line[0], last_line[1], False)
-                line_triples.append(replacement)
-                AddErrorLine(errors, line_pairs[index1])
+                # I know).  Overwrite its triple with one that has
+                # the Boolean changed from True to False, then write
+                # it to the log file.
+                line_triples[-1] = line_pairs[index1 - 1] + (False,)
+                AddErrorLine(errors, line_pairs[index1 - 1])
             # Append however many extra lines there are in the message to
             # to the log file and update index1.
             for discard in range(lines_fwd):
-                line_num, line_text = line_pairs[index1]
-                line_triples.append((line_num, line_text, False))
-                AddErrorLine(errors, line_pairs[index1])
+                line_pair = line_pairs[index1]
+                line_triples.append(line_pair + (False,))
+                AddErrorLine(errors, line_pair)
                 index1 += 1
 
 
@@ -1187,14 +1215,27 @@ def DebugPrintDict(dictionary, descrip):
     of the dictionary.  If the debug1 boolean is true, we call this
     at the end of each read of a form.
     '''
-    print("Dictionary so far for " + descrip + ":")
-    for entry in dictionary:
-        if type(entry) is float:
+    # Build all the lines and print them in one call, as the dictionaries
+    # can be large.
+    lines = ["Dictionary so far for " + descrip + ":"]
+    for key, value in dictionary.items():
+        if type(value) is float:
             # It's a number, remove spurious trailing digits and
             # print it.
-            print(entry,":", gen.FloatText(dictionary[entry]))
+            lines.append(str(key) + " : " + gen.FloatText(value))
         else:
-            print(entry,":", dictionary[entry])
+            lines.append(str(key) + " : " + str(value))
+    print("\n".join(lines))
+
+
+# A regex that matches the lines giving the version number of OpenSES,
+# such as "OpenSES, 4.2     , 14 July 2021" (finalised versions, ending
+# in the year of issue) and "OpenSES, 4.3ALPHA, XXXXXXXXXXXX" (the
+# development branch).  The version is in group 1 for the former and in
+# group 2 for the latter.  The year test has a year 2100 problem, which
+# I'm not going to worry about.
+ver_line = re.compile(r"OpenSES,\s+(\S+)\s.*20\d\d\s*$"
+                      r"|\s*OpenSES, (4\.3ALPHA), XXXXXXXXXXXX\s*$")
 
 
 def GetOpenSESData(file_conts, file_name, log):
@@ -1220,6 +1261,8 @@ def GetOpenSESData(file_conts, file_name, log):
             be found.
             Aborts with 8203 if the line with the run date/time could not
             be found.
+            Aborts with 8204 if there were no non-blank lines after the
+            run date/time.
     '''
     # We enter this routine after we've found the line that starts the
     # BSD 3 clause licence text.  We want the line with the version,
@@ -1229,27 +1272,24 @@ def GetOpenSESData(file_conts, file_name, log):
     # format field is altered.
 
     file_stem = file_name[:-4]
-    # Set up some Booleans for the first two things we're looking for.
-    found_version = False
-    found_rundate = False
-    found_1A = False
-
-    for line in file_conts:
-        # Seek out lines like "OpenSES, 4.2     , 14 July 2021".  The
-        # second part of the test has a year 2100 problem, which I'm not
-        # going to worry about.  This applies to finalised versions of
-        # OpenSES.  The interim versions don't have a date, they have
-        # "XXXXXXXXXXXX" instead.  Those are handled in "else" clauses.
-        if ( line[:9] == "OpenSES, " and
-             (re.search("20\d\d", line.rstrip()[-4:]) is not None)
-           ):
-            parts = line.split()
-            SES_version = parts[1]
+
+    # The three things we want come in order, so we search for them in
+    # three loops that share one iterator.  Each loop picks up where the
+    # previous one stopped and breaks as soon as it has found its line.
+    # The "else" clauses of the loops catch files that ran out of lines.
+    lines = iter(file_conts)
+
+    for line in lines:
+        # Seek out lines like "OpenSES, 4.2     , 14 July 2021".  This
+        # applies to finalised versions of OpenSES.  The interim versions
+        # don't have a date, they have "XXXXXXXXXXXX" instead.  Those
+        # are handled in the "elif" clause.
+        ver_match = ver_line.match(line)
+        if ver_match is not None and ver_match.group(1) is not None:
+            SES_version = ver_match.group(1)
             # Just in case they use a Fortran 'trim' command later,
-            # check for a comma at the end of the version number and
-            # remove it if it is there.
-            if SES_version[-1] == ",":
-                SES_version[-1] == SES_version[:-1]
+            # remove any comma at the end of the version number.
+            SES_version = SES_version.rstrip(",")
             # Now check if it is a valid version.  The only valid
             # version is 4.2 (at January 2023) but 4.3 may be finalised
             # some time, so it's included.
@@ -1260,46 +1300,18 @@ def GetOpenSESData(file_conts, file_name, log):
                        '> recognised.  This converter can only handle\n'
                        '> OpenSES versions 4.2 and 4.3, this one has the\n'
                        '> version ' + SES_version + ' on the following line:\n'
-                       '>   ' + line.lstrip().rstrip() + '\n'
+                       '>   ' + line.strip() + '\n'
                        '> Please raise a bug report so that the program\n'
                        '> can be updated to deal with the new version.')
                 gen.WriteError(8201, err, log)
                 return(None)
-            found_version = True
-        elif line.strip() == "OpenSES, 4.3ALPHA, XXXXXXXXXXXX":
+            break
+        elif ver_match is not None:
             # The OPENSES development branch (at February 2023) has
             # "XXXXXXXXXXXX" in the line in place of the date.
-            SES_version = "4.3ALPHA"
-            found_version = True
-
-
-        if line[:22] == "Simulation started at:":
-            rundate = line.lstrip().rstrip().split(sep = ':', maxsplit = 1)[-1].lstrip()
-            found_rundate = True
-            # Now spoof a blank line so we don't use the run date and time
-            # in the next block.
-            line = ""
-
-        # Now test for the first non-blank line after the run date and time.
-        if found_rundate and found_version:
-            contents = line.lstrip().rstrip()
-            if contents != "":
-                # This is the first line of form 1A (if there is one) or
-                # Form 1B.  Check for form 1B and replace it.
-                found_1A = True
-                if contents[:11] == "DESIGN TIME" and contents[17:20] == "HRS":
-                    # This line is form 1B.
-                    form1A = "SES file with no entries in form 1A"
-                else:
-                    form1A = contents
-                break
-
-    if found_1A:
-        # We now have a rundate, a version and the first line of form 1A.
-        # Spoof the header and footer.
-        header = "OpenSES v" + "{0:<10}".format(SES_version) + form1A
-        footer = "File: " + file_stem + ".ses (or .inp)    Simulation time: " + rundate
-    elif not found_version:
+            SES_version = ver_match.group(2)
+            break
+    else:
         # We didn't find the version number.
         err = ('> "' + file_name + '" does not seem\n'
                '> to be an OpenSES output file, as a line giving\n'
@@ -1309,7 +1321,12 @@ def GetOpenSESData(file_conts, file_name, log):
                '> Are you sure this file came from OpenSES?')
         gen.WriteError(8202, err, log)
         return(None)
-    elif not found_rundate:
+
+    for line in lines:
+        if line[:22] == "Simulation started at:":
+            rundate = line[22:].strip()
+            break
+    else:
         # We found the version but not the run date and time.
         err = ('> "' + file_name + '" does not seem\n'
                '> to be an OpenSES output file, as a line giving\n'
@@ -1319,6 +1336,34 @@ def GetOpenSESData(file_conts, file_name, log):
                '> Are you sure this file came from OpenSES?')
         gen.WriteError(8203, err, log)
         return(None)
+
+    # Now look for the first non-blank line after the run date and time.
+    for line in lines:
+        contents = line.strip()
+        if contents != "":
+            # This is the first line of form 1A (if there is one) or
+            # Form 1B.  Check for form 1B and replace it.
+            if contents[:11] == "DESIGN TIME" and contents[17:20] == "HRS":
+                # This line is form 1B.
+                form1A = "SES file with no entries in form 1A"
+            else:
+                form1A = contents
+            break
+    else:
+        # We found the version and the run date and time but nothing
+        # after them.
+        err = ('> "' + file_name + '" looks like an OpenSES\n'
+               '> output file but it ends after the line giving\n'
+               '> the run date and time.  It looks like your\n'
+               '> OpenSES output file is corrupted.  Try rerunning\n'
+               '> the file.')
+        gen.WriteError(8204, err, log)
+        return(None)
+
+    # We now have a rundate, a version and the first line of form 1A.
+    # Spoof the header and footer.
+    header = "OpenSES v" + "{0:<10}".format(SES_version) + form1A
+    footer = "File: " + file_stem + ".ses (or .inp)    Simulation time: " + rundate
     return(header, footer, SES_version)
 
 
@@ -1349,19 +1394,24 @@ def Form1A(line_pairs, file_name, file_num, file_count, out, log):
     comments = []
     errors = []
 
+    # The tests below check for text at fixed columns with startswith,
+    # endswith and find so that we don't make new strings by slicing
+    # every line.  The lines have no trailing whitespace, so
+    # "SIMULATION OF" has to be in columns 51-63 and end the line.
     for index, (line_num, line) in enumerate(line_pairs[:40]):
-        shortline =line[25:]
-        if shortline[25:] == "SIMULATION OF" or "Simulation started" in shortline:
+        if ( (len(line) == 63 and line.endswith("SIMULATION OF")) or
+             line.find("Simulation started", 25) != -1
+           ):
             # We are at the start of the comments.  Start logging
             # them.
             comments_on = True
-        elif shortline[11:22] == "DESIGN TIME" and shortline[28:31] == "HRS":
+        elif line.startswith("DESIGN TIME", 36) and line.startswith("HRS", 53):
             # We are at the end of the comments.  Break out, noting
             # that we found the end of the comments.
             comments_on = False
             break
         elif comments_on:
-            comments.append(shortline)
+            comments.append(line[25:])
         gen.WriteOut(line, out)
     # Filter out the lines of errors 32 (bad hour) and 33 (bad month)
     # if one or both occurred (they are not comments).  We check for a
@@ -1397,6 +1447,13 @@ def Form1A(line_pairs, file_name, file_num, file_count, out, log):
     return(comments, errors, index)
 
 
+# A dictionary of the month names SES prints in form 1B.  It yields the
+# month number, 1 to 12.
+month_nums = {"JANUARY": 1, "FEBRUARY": 2, "MARCH": 3, "APRIL": 4,
+              "MAY": 5, "JUNE": 6, "JULY": 7, "AUGUST": 8,
+              "SEPTEMBER": 9, "OCTOBER": 10, "NOVEMBER": 11, "DECEMBER": 12}
+
+
 def Form1B(line_pair, file_name, log):
     '''Process form 1B and return the time, month and year in the
     number form they have in the input file.  Note that if an incorrect
@@ -1428,9 +1485,6 @@ def Form1B(line_pair, file_name, log):
 
 
     '''
-    months = ("JANUARY", "FEBRUARY", "MARCH", "APRIL", "MAY", "JUNE", "JULY",
-              "AUGUST", "SEPTEMBER", "OCTOBER", "NOVEMBER", "DECEMBER")
-
     (line_num, line_text) = line_pair
     # We were given a line that started with "DESIGN TIME" but it is possible
     # that it is a line of comment text rather than form 1B.  It should be
@@ -1497,9 +1551,8 @@ def Form1B(line_pair, file_name, log):
         mins = time_text[-2:]
         design_time = hour + ':' + mins
 
-    try:
-        month = months.index(month_text) + 1
-    except ValueError:
+    month = month_nums.get(month_text)
+    if month is None:
         err = ('> Failed to find a valid month in form 1B in file "'
                + file_name + '".\n'
               '> The text giving the month should have been something\n'
@@ -1584,13 +1637,14 @@ def GetValidLine(line_triples, tr_index, out, log):
                        "> the SES output file for clues about what\n"
                        "> went wrong.  Here are the last ten lines of\n"
                        "> the output file (possibly truncated):\n")
+                last_ten = []
                 for index in range(max(0, tr_index - 10), tr_index):
                     line = line_triples[index][1]
                     if len(line) > 77:
                         # Truncate the line to 79 characters.
                         line = line[:74] + "..."
-                    err = err + "> " + line + "\n"
-                err = err + (
+                    last_ten.append("> " + line + "\n")
+                err = err + "".join(last_ten) + (
                        ">\n"
                        "> If those ten lines give no clues as to what\n"
                        "> happened, try running SES again.  But run\n"
@@ -5096,6 +5150,7 @@ def Form8(line_triples, tr_index, settings_dict, form3_dict, sec_seg_dict,
             # at the interior points so we get a step change.  We use
             # numpy's "repeat" function then cut off the first and
             # last values.
+            import numpy as np
             paired_chs = list(np.repeat(single_chs,2))[1:-1]
             gradient2 = list(np.repeat(route_dict["gradient"],2))
             speedlimit2 = list(np.repeat(route_dict["max_speed"],2))
@@ -7890,8 +7945,12 @@ def ProcessFile(arguments):
     # encountered a weird PowerShell bug on one computer: PowerShell
     # passed the user's home directory to Python instead of the current
     # working directory.
+    # We read and write with a 1 MiB buffer instead of the default
+    # 8 KiB, as the files can be tens of MB and are written one line
+    # at a time.
     try:
-        inp = open(dir_name + file_name, 'r', encoding='utf-8')
+        inp = open(dir_name + file_name, 'r', encoding='utf-8',
+                   buffering = 1 << 20)
     except PermissionError:
         print('> *Error* type 8002 ******************************\n'
               '> Skipping "' + file_name + '" in folder\n'
@@ -7911,9 +7970,12 @@ def ProcessFile(arguments):
         # all the trailing spaces.  .PRN files have trailing spaces
         # on most lines.  .TMP and .OUT files only have them on a
         # few.  If we strip off the trailing spaces here we get
-        # fewer differences.
-        file_conts = [line.rstrip() for line in inp.readlines()]
-        inp.close()
+        # fewer differences.  We iterate over the file object rather
+        # than calling readlines(), so we don't hold a second copy of
+        # every line (with its trailing spaces) in memory while we
+        # strip them.
+        with inp:
+            file_conts = [line.rstrip() for line in inp]
 
 
     # Create a logfile to hold observations and debug entries.
@@ -8008,7 +8070,8 @@ def ProcessFile(arguments):
     # Try and open the SI version of the .PRN file, fault if we can't.
     out_name = file_stem + extension + ".txt"
     try:
-        out = open(dir_name + out_name, 'w', encoding='utf-8')
+        out = open(dir_name + out_name, 'w', encoding='utf-8',
+                   buffering = 1 << 20)
     except PermissionError:
         err = ('> Skipping "' + file_name + '", because you\n'
                "> do not have permission to write to its output file.")
@@ -8045,8 +8108,16 @@ def ProcessFile(arguments):
     # at the input stage, failed due to a simulation error, ran to
     # completion or had issues with flow reversal.  It writes these
     # states and errors to the log file.
-    line_triples, errors = FilterErrors(line_pairs[index1B:],
-                                        errors, log, debug1)
+    result = FilterErrors(line_pairs[index1B:], errors, log, debug1)
+    if result is None:
+        # We found an SES error message that we don't know how to
+        # skip over.  The routine has already issued a suitable error
+        # message.
+        CloseDown("skip", out, log)
+        gen.PauseIfLast(file_num, file_count)
+        return()
+    else:
+        line_triples, errors = result
 
 
     # Turn the line holding form 1B into numbers.
@@ -10296,10 +10367,8 @@ def ReadTimeSteps(line_triples, tr_index, settings_dict, forms2to13,
     #
     # Now try to import Python libraries that are not in the base distribution
     # and that the user has to install.  Raise an error message if they have
-    # not been installed on this system and write it to the logfile.  They
-    # will have already been imported at global scope if they are available
-    # so this won't slow us down.  But if we raise the error here we can write
-    # the failure to the logfile where it is more likely to be noticed.
+    # not been installed on this system and write it to the logfile, where
+    # it is more likely to be noticed.
     try:
         package_name = "numpy"
         import numpy as np
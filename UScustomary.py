@@ -318,6 +318,12 @@ USequivalents = { #key      SI unit,      US unit,     divisor
                  "trafdens":  ("veh/lane-km", "veh/lane-mile",0.621371192237334),
                 }
 
+# The keys of the conversions above that have a conversion factor of 1.0.
+# ConvertToUS and ConvertToSI check this set so that they don't have to
+# compare the factor to 1.0 every time they are called.
+unity_keys = frozenset(key for (key, yielded) in USequivalents.items()
+                       if math.isclose(yielded[2], 1.0))
+
 
 # Now make a list of conversion factors for SVS, which is in SI units.
 # You might think that these conversion factors are all 1.0, but several
@@ -559,7 +565,7 @@ def ConvertToUS(key, SIvalue, debug1, log):
             # piece of production code.
             gen.OopsIDidItAgain(log)
 
-    if math.isclose(yielded[2], 1.0):
+    if key in unity_keys:
         # No need to do any arithmetic, the conversion factor is 1.0.
         USvalue = SIvalue
         if debug1:
@@ -646,7 +652,7 @@ def ConvertToSI(key, USvalue, debug1, log):
             # piece of production code.
             gen.OopsIDidItAgain(log)
 
-    if math.isclose(yielded[2], 1.0):
+    if key in unity_keys:
         # No need to do any arithmetic, the conversion factor is 1.0.
         SIvalue = USvalue
         if debug1:
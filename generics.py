@@ -14,6 +14,7 @@
 # 1061-1063.
 
 import math
+import functools
 
 def PauseFail():
     '''We have printed an error message to the runtime screen for
@@ -34,9 +35,12 @@ def PauseFail():
     sys.exit()
 
 
+@functools.lru_cache(maxsize = 128, typed = True)
 def Enth(number):
     '''Take an integer and return its ordinal as a string (1 > "1st",
-    11 > "11th", 121 > "121st").
+    11 > "11th", 121 > "121st").  The results are cached because this
+    is called for every word of input that Hobyah.py reads.  The cache
+    is typed so that 1.0 and True still raise error 1021.
 
         Parameters:
             number      int         e.g. 13
@@ -1112,9 +1116,11 @@ def LogBlock(dictionary, block_name, debug1, log):
             None
     '''
     # Write the dictionary to the logfile (and if the debug Boolean
-    # is set, to the screen too).
+    # is set, to the screen too).  We build all the lines first and
+    # write them in one call, as this is called once for every entry
+    # in some blocks.
     header = "Added " + block_name + ":"
-    WriteOut(header, log)
+    lines = [header]
     if debug1:
         print(header)
 
@@ -1123,9 +1129,11 @@ def LogBlock(dictionary, block_name, debug1, log):
             # We don't write the file comments, as they're already in the file.
             value = dictionary[key]
             entry = "   " + key + ": " + str(value)
-            WriteOut(entry, log)
+            lines.append(entry)
             if debug1:
                 print(entry)
+    lines.append("")
+    log.write("\n".join(lines))
     return()
 
 
@@ -51,10 +51,10 @@ def CheckClosures(list_of_lines, input_start, file_name,
                                             data.
             file_name       str             The name of the file, used in error
                                             messages.
-            unnamed         [str]           A list of names of blocks that do
+            unnamed         frozenset       The names of blocks that do
                                             not need to be named, e.g.
                                             "begin settings".
-            named           [str]           A list of names of blocks that do
+            named           frozenset       The names of blocks that do
                                             need to be named, e.g.
                                             "begin tunnel westbound".
             log             handle          The handle of the logfile.
@@ -156,7 +156,8 @@ def CheckClosures(list_of_lines, input_start, file_name,
             # and unwanted names added to begin commands.
             if first_key == "begin":
                 if (len(words) > 1 and
-                    words[1].lower() not in unnamed + named):
+                    words[1].lower() not in unnamed and
+                    words[1].lower() not in named):
                     # We have a block of a type that is not allowed.
                     err = ('> Found a "' + first_key + ' ' + noun
                              + '" command.  This is an\n'
@@ -320,7 +321,7 @@ def CheckBeginEnd(list_of_lines, file_name, unnamed, named,
             list_of_lines   [str]           List of lines in the file.
             file_name       str             The name of the file, used in error
                                             messages.
-            unnamed         [str]           A list of blocks that do not need to
+            unnamed         frozenset       The blocks that do not need to
                                             be named.
             prog_name       str             The name of the program calling this
                                             routine, used in error messages.
@@ -463,27 +464,16 @@ def CheckBeginEnd(list_of_lines, file_name, unnamed, named,
     #  0  line number
     #  1  nothing but the valid input on the line
     #  2  the entire line with trailing spaces removed
+    # We start the line count at one, not zero, because most text
+    # editors start at line 1.
     line_triples = []
-    for index, line in enumerate(list_of_lines[input_start:input_end + 1]):
-        line_num = index + input_start
-
-        if "#" in line:
-            # Split the data from the comment
-            data, discard = line.split("#", maxsplit = 1)
-        else:
-            data = line
-        # See if this line that has data on it (some lines
-        # will be comments only)
-        short_data = data.lstrip().rstrip()
-        if short_data != "":
-            # Add the line to the triples.  We add one to the
-            # line_num because most text editors start at line 1,
-            # not line zero.
-            line_triples.append((line_num + 1,
-                                 short_data,
-                                 line.rstrip()
-                                )
-                               )
+    for line_num, line in enumerate(list_of_lines[input_start:input_end + 1],
+                                    start = input_start + 1):
+        # Split the data from the comment (if there is one) and see
+        # if the line has data on it (some lines will be comments only).
+        short_data = line.partition("#")[0].strip()
+        if short_data:
+            line_triples.append((line_num, short_data, line.rstrip()))
     # Make a list that is an index to where each begin command is in
     # line_triples.
     begin_lines = FindBegins(line_triples)